@@ -1,16 +1,85 @@
 import sys
 import os
 import io
+import argparse
 
 from optimizer.core.uac import ensure_elevated_or_exit
 from optimizer.core.dependencies import ensure_dependencies
 from optimizer.ui.gui import ModernOptimizerGUI
 
 
+def parse_args(argv=None):
+    """Parses the command line (unknown arguments are ignored)."""
+    parser = argparse.ArgumentParser(prog="OptiBundler")
+    parser.add_argument(
+        "--export-bundle", metavar="PATH",
+        help="Download every artifact into an offline bundle and exit.")
+    parser.add_argument(
+        "--bundle", metavar="PATH",
+        help="Serve downloads from this offline bundle instead of the network.")
+    parser.add_argument(
+        "--serve-cache", metavar="[HOST:]PORT", nargs="?", const="",
+        help="Share the local artifact cache with other instances on the LAN "
+             "(default port 8765) and exit on Ctrl+C.")
+    return parser.parse_known_args(argv)[0]
+
+
+def export_bundle(path):
+    """Creates an offline bundle at `path` (no GUI, no elevation needed)."""
+    from optimizer.core import bundle
+
+    def _on_item(name, entry):
+        print(f"  + {name}: {entry['filename']} ({entry['size'] / 1048576:.1f} MB)")
+
+    print(f"Exporting offline bundle to {path} ...")
+    manifest = bundle.export_bundle(path, on_item=_on_item)
+    print(f"Done: {len(manifest['artifacts'])} artifacts.")
+
+
+def serve_cache(addr):
+    """Serves the artifact cache to LAN peers until interrupted."""
+    import logging
+    from optimizer.core import artifact_cache, peer_cache
+    from optimizer.core.logging_setup import setup_logging, PhaseLoggerAdapter, SESSION_ID
+
+    host, _, port = addr.rpartition(":")
+    cache = artifact_cache.default_cache()
+    if cache is None:
+        print("Artifact cache is disabled (OPTIMIZER_CACHE_MAX_MB=0), nothing to serve.")
+        return
+    setup_logging(logging.INFO)
+    log = PhaseLoggerAdapter(logging.getLogger("optimizer"), {"phase": "peer", "sid": SESSION_ID})
+    server = peer_cache.PeerServer(cache, host, int(port or peer_cache.PEER_PORT), log=log)
+    print(f"Serving {cache.root} on port {server.server_address[1]} (Ctrl+C to stop) ...")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
 def main():
     """
     Main function to run the optimizer.
     """
+    args = parse_args(sys.argv[1:])
+    if args.bundle:
+        # Über die Umgebung, damit es den UAC-Neustart übersteht
+        os.environ["OPTIMIZER_BUNDLE"] = os.path.abspath(args.bundle)
+
+    if args.export_bundle:
+        if ensure_dependencies():
+            os.execv(sys.executable, [sys.executable] + sys.argv)
+        export_bundle(os.path.abspath(args.export_bundle))
+        return
+
+    if args.serve_cache is not None:
+        if ensure_dependencies():
+            os.execv(sys.executable, [sys.executable] + sys.argv)
+        serve_cache(args.serve_cache)
+        return
+
     ensure_elevated_or_exit()
 
     # Perform dependency check and install if necessary
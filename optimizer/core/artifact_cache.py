@@ -0,0 +1,232 @@
+import json
+import os
+import shutil
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from . import utils
+from .config import BASE_DIR
+# Liegt bewusst außerhalb von optimizer_downloads, damit Cleanup ihn nicht löscht
+CACHE_DIR = os.environ.get("OPTIMIZER_CACHE_DIR") or os.path.join(
+    BASE_DIR, "artifact_cache")
+MAX_CACHE_MB = 2048
+
+
+class ArtifactCache:
+    """Content-addressed store for downloaded artifacts.
+
+    Layout:
+        <root>/objects/<sha[:2]>/<sha>   file contents, keyed by SHA-256
+        <root>/index.json                URL -> sha256 + validators,
+                                         sha256 -> size + last use (LRU)
+
+    Working copies are materialized as hard links (copy as fallback), so
+    deleting them never touches the stored object. Writing to one in place
+    does, though (e.g. a self-updating tool): every object therefore keeps
+    its [size, mtime_ns] stamp, and an object whose stamp changed is
+    re-hashed before use and dropped if it no longer matches its digest.
+    """
+
+    def __init__(self, root: str = CACHE_DIR,
+                 max_bytes: int = MAX_CACHE_MB * 1024 * 1024) -> None:
+        self.root = root
+        self.max_bytes = max_bytes
+        self.index_path = os.path.join(root, "index.json")
+        self._lock = threading.Lock()
+        self._index = self._load_index()
+
+    def _load_index(self) -> Dict[str, Any]:
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if isinstance(data, dict):
+                data.setdefault("urls", {})
+                data.setdefault("objects", {})
+                return data
+        except Exception:
+            pass
+        return {"version": 1, "urls": {}, "objects": {}}
+
+    def _save_index(self) -> None:
+        utils.ensure_dir(self.root)
+        tmp = self.index_path + ".tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self._index, f)
+        os.replace(tmp, self.index_path)
+
+    def object_path(self, sha256: str) -> str:
+        """Path of the stored object for a hex digest."""
+        return os.path.join(self.root, "objects", sha256[:2], sha256)
+
+    def _object_ok(self, sha256: str) -> bool:
+        """True if the stored object still matches its digest.
+
+        Unchanged size+mtime is trusted; otherwise the object is re-hashed
+        (outside the lock) and removed from the cache if it was modified.
+        """
+        path = self.object_path(sha256)
+        stamp = utils.file_stamp(path)
+        if stamp is None:
+            return False
+        with self._lock:
+            obj = self._index["objects"].get(sha256)
+            if obj is not None and obj.get("stamp") == stamp:
+                return True
+        intact = utils.compute_sha256(path) == sha256
+        with self._lock:
+            obj = self._index["objects"].get(sha256)
+            if intact:
+                if obj is not None:
+                    obj["stamp"] = stamp
+            else:
+                # Über einen Hardlink verändert -> Objekt ist unbrauchbar
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+                self._index["objects"].pop(sha256, None)
+                for url in [u for u, e in self._index["urls"].items()
+                            if e.get("sha256") == sha256]:
+                    del self._index["urls"][url]
+            try:
+                self._save_index()
+            except OSError:
+                pass
+        return intact
+
+    def lookup(self, url: str) -> Optional[Dict[str, Any]]:
+        """Returns the index entry for `url` if its object is intact."""
+        with self._lock:
+            entry = self._index["urls"].get(url)
+            if not entry:
+                return None
+            entry = dict(entry)
+        if not self._object_ok(entry["sha256"]):
+            return None
+        return entry
+
+    @staticmethod
+    def is_fresh(entry: Dict[str, Any], max_age: float) -> bool:
+        """True if the entry was stored or revalidated within `max_age` s."""
+        seen = max(entry.get("stored_at") or 0, entry.get("verified_at") or 0)
+        return time.time() - seen < max_age
+
+    def mark_verified(self, url: str) -> None:
+        """Records a successful revalidation (e.g. HTTP 304) for `url`."""
+        with self._lock:
+            entry = self._index["urls"].get(url)
+            if entry is not None:
+                entry["verified_at"] = time.time()
+                try:
+                    self._save_index()
+                except OSError:
+                    pass
+
+    def materialize(self, sha256: str, dest: str) -> bool:
+        """Places the object `sha256` at `dest`. Returns False if missing."""
+        src = self.object_path(sha256)
+        if not self._object_ok(sha256):
+            return False
+        utils.ensure_dir(os.path.dirname(dest) or ".")
+        tmp = dest + ".cache-tmp"
+        try:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            try:
+                os.link(src, tmp)
+            except OSError:
+                shutil.copyfile(src, tmp)
+            os.replace(tmp, dest)
+        except OSError:
+            return False
+        with self._lock:
+            obj = self._index["objects"].get(sha256)
+            if obj is not None:
+                obj["last_used"] = time.time()
+                try:
+                    self._save_index()
+                except OSError:
+                    pass
+        return True
+
+    def store(self, path: str, url: str, etag: Optional[str] = None,
+              last_modified: Optional[str] = None,
+              sha256: Optional[str] = None,
+              source: Optional[str] = None) -> str:
+        """Adds the file at `path` and indexes it under `url` + validators.
+
+        `source` is the mirror the validators belong to (default: `url`).
+
+        Returns:
+            The SHA-256 hex digest of the stored object.
+        """
+        sha256 = (sha256 or utils.compute_sha256(path)).lower()
+        size = os.path.getsize(path)
+        obj_path = self.object_path(sha256)
+        # Vorhandenes Objekt nur übernehmen, wenn es unverändert ist
+        if not os.path.exists(obj_path) or not self._object_ok(sha256):
+            utils.ensure_dir(os.path.dirname(obj_path))
+            tmp = obj_path + ".tmp"
+            try:
+                os.link(path, tmp)
+            except OSError:
+                shutil.copyfile(path, tmp)
+            os.replace(tmp, obj_path)
+        now = time.time()
+        with self._lock:
+            self._index["objects"][sha256] = {
+                "size": size, "last_used": now,
+                "stamp": utils.file_stamp(obj_path)}
+            self._index["urls"][url] = {
+                "sha256": sha256,
+                "size": size,
+                "etag": etag,
+                "last_modified": last_modified,
+                "source": source or url,
+                "stored_at": now,
+            }
+            self._evict(keep=sha256)
+            self._save_index()
+        return sha256
+
+    def forget(self, url: str) -> None:
+        """Drops the URL mapping (e.g. after a failed hash check)."""
+        with self._lock:
+            if self._index["urls"].pop(url, None) is not None:
+                try:
+                    self._save_index()
+                except OSError:
+                    pass
+
+    def _evict(self, keep: str) -> None:
+        """Drops least recently used objects until the size cap holds."""
+        objects = self._index["objects"]
+        total = sum(o.get("size", 0) for o in objects.values())
+        for sha in sorted(objects, key=lambda k: objects[k].get("last_used", 0)):
+            if total <= self.max_bytes:
+                break
+            if sha == keep:
+                continue
+            try:
+                os.remove(self.object_path(sha))
+            except FileNotFoundError:
+                pass
+            except OSError:
+                # z.B. unter Windows noch in Benutzung -> später erneut
+                continue
+            total -= objects.pop(sha).get("size", 0)
+            for url in [u for u, e in self._index["urls"].items()
+                        if e.get("sha256") == sha]:
+                del self._index["urls"][url]
+
+
+def default_cache() -> Optional[ArtifactCache]:
+    """Cache at CACHE_DIR; OPTIMIZER_CACHE_MAX_MB=0 disables it."""
+    try:
+        max_mb = int(os.environ.get("OPTIMIZER_CACHE_MAX_MB", MAX_CACHE_MB))
+    except ValueError:
+        max_mb = MAX_CACHE_MB
+    if max_mb <= 0:
+        return None
+    return ArtifactCache(CACHE_DIR, max_mb * 1024 * 1024)
@@ -0,0 +1,185 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+import zipfile
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from . import cancel as cancel_mod
+from . import catalog
+from . import downloads
+from . import utils
+from .config import BASE_DIR
+from .logging_setup import log_event
+
+# Wird beim Start automatisch eingebunden, falls vorhanden
+DEFAULT_BUNDLE = os.path.join(BASE_DIR, "optimizer_bundle.zip")
+ENV_VAR = "OPTIMIZER_BUNDLE"
+MANIFEST = "manifest.json"
+BUNDLE_VERSION = 1
+COPY_CHUNK = 1024 * 1024
+
+
+def bundle_sources(links: Dict[str, Any]
+                   ) -> Dict[str, Tuple[str, Dict[str, Any]]]:
+    """Every artifact the wizard may need: name -> (url, options).
+
+    Both Talon variants, EXM Tweaks, BoosterX and all guide tools, so one
+    bundle serves Windows 10 and 11 machines alike.
+    """
+    sources = {}
+    for key, entry in links.get("download_urls", {}).items():
+        sources[key] = downloads.parse_entry(entry)
+    for key, entry in links.get("guide_downloads", {}).items():
+        sources[key] = downloads.parse_entry(entry)
+    return sources
+
+
+class Bundle:
+    """Read side of an offline bundle (stored zip + manifest.json).
+
+    Members are stored uncompressed, so the zip's central directory is the
+    index: a lookup costs one dict access and materialize() seeks straight
+    to the member and copies only its bytes, hashing as it goes.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = os.path.abspath(path)
+        self._zip = zipfile.ZipFile(self.path, 'r')
+        manifest = json.loads(self._zip.read(MANIFEST).decode('utf-8'))
+        if manifest.get("version") != BUNDLE_VERSION:
+            self._zip.close()
+            raise ValueError(
+                f"Unsupported bundle version {manifest.get('version')}")
+        self.artifacts: Dict[str, Dict[str, Any]] = manifest["artifacts"]
+        self._by_url = {e["url"]: dict(e, name=name)
+                        for name, e in self.artifacts.items()}
+
+    def lookup(self, url: str) -> Optional[Dict[str, Any]]:
+        return self._by_url.get(url)
+
+    def materialize(self, entry: Dict[str, Any], dest: str,
+                    on_chunk: Optional[Callable[[int], None]] = None,
+                    cancel: Optional[cancel_mod.CancelToken] = None) -> str:
+        """Copies the member of `entry` to `dest`; returns its SHA-256.
+
+        Raises:
+            ValueError: If the copy does not match the manifest hash.
+            cancel.Cancelled: If `cancel` fired; `dest` is left untouched.
+        """
+        utils.ensure_dir(os.path.dirname(dest) or ".")
+        tmp = dest + ".bundle"
+        hasher = hashlib.sha256()
+        try:
+            with self._zip.open(entry["member"]) as src, \
+                    open(tmp, 'wb') as out:
+                for chunk in iter(lambda: src.read(COPY_CHUNK), b''):
+                    cancel_mod.check(cancel)
+                    hasher.update(chunk)
+                    out.write(chunk)
+                    if on_chunk is not None:
+                        on_chunk(len(chunk))
+            digest = hasher.hexdigest()
+            if digest != entry["sha256"]:
+                raise ValueError(
+                    f"Bundle member {entry['member']} is corrupt: "
+                    f"expected {entry['sha256']}, got {digest}")
+            os.replace(tmp, dest)
+            return digest
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+    def close(self) -> None:
+        self._zip.close()
+
+
+def export_bundle(out_path: str, links_path: Optional[str] = None,
+                  log: Optional[Any] = None,
+                  on_item: Optional[Callable[[str, Dict[str, Any]], None]]
+                  = None) -> Dict[str, Any]:
+    """Downloads every artifact and packs it into one bundle at `out_path`.
+
+    Uses the normal download manager (cache, mirrors, resume). Without
+    `links_path` the current catalog is used (refreshed first, so a
+    remote catalog is honoured). Entries with a known hash ("sha256" in
+    links.json or links.lock, see downloads.expected_sha256) are checked
+    before they are packed.
+    The bundle is written to a temporary file and renamed at the end.
+
+    Returns:
+        The manifest that was written.
+    """
+    if links_path is None:
+        catalog.refresh(log)
+        links = catalog.get_catalog().links
+    else:
+        with open(links_path, 'r', encoding='utf-8') as f:
+            links = json.load(f)
+    manager = downloads.get_manager()
+    manifest: Dict[str, Any] = {"version": BUNDLE_VERSION,
+                                "created_at": time.time(), "artifacts": {}}
+    work = tempfile.mkdtemp(prefix="optibundle-")
+    tmp = out_path + ".tmp"
+    try:
+        with zipfile.ZipFile(tmp, 'w', zipfile.ZIP_STORED,
+                             allowZip64=True) as z:
+            for name, (url, opts) in bundle_sources(links).items():
+                filename = utils.filename_from_url(url, f"{name}.bin")
+                dest = os.path.join(work, name, filename)
+                result = manager.fetch(url, dest, opts)
+                expected = downloads.expected_sha256(url, opts)
+                if expected and expected != result.sha256:
+                    raise ValueError(
+                        f"SHA256-Mismatch for {name}: expected {expected}, "
+                        f"got {result.sha256}")
+                member = f"artifacts/{name}/{filename}"
+                z.write(dest, member)
+                entry = {"url": url, "member": member, "filename": filename,
+                         "size": os.path.getsize(dest),
+                         "sha256": result.sha256, "etag": result.etag,
+                         "last_modified": result.last_modified}
+                manifest["artifacts"][name] = entry
+                if log is not None:
+                    log_event(log, "bundle_add", name=name, bytes=entry["size"],
+                              from_cache=result.from_cache)
+                if on_item is not None:
+                    on_item(name, entry)
+                os.remove(dest)
+            z.writestr(MANIFEST, json.dumps(manifest, indent=2))
+        os.replace(tmp, out_path)
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    return manifest
+
+
+def mount(path: Optional[str] = None, log: Optional[Any] = None
+          ) -> Optional[Bundle]:
+    """Attaches a bundle to the download manager.
+
+    Without `path`, $OPTIMIZER_BUNDLE or optimizer_bundle.zip next to the
+    app is used if present. From then on fetch() serves bundled URLs from
+    the bundle instead of the network.
+    """
+    path = path or os.environ.get(ENV_VAR) or (
+        DEFAULT_BUNDLE if os.path.exists(DEFAULT_BUNDLE) else None)
+    if not path:
+        return None
+    try:
+        bundle = Bundle(path)
+    except Exception as e:
+        if log is not None:
+            log_event(log, "bundle_mount_fail", path=path, err=str(e))
+        return None
+    manager = downloads.get_manager()
+    old, manager.bundle = manager.bundle, bundle
+    if old is not None:
+        old.close()
+    if log is not None:
+        log_event(log, "bundle_mounted", path=bundle.path,
+                  artifacts=sorted(bundle.artifacts))
+    return bundle
@@ -0,0 +1,95 @@
+import subprocess
+import threading
+import time
+from typing import Any, List, Optional
+
+# Abfrage-Intervall beim Warten auf Prozesse (Obergrenze bis zum Abbruch)
+POLL_INTERVAL = 0.25
+# Gnadenfrist nach terminate(), danach kill()
+KILL_GRACE = 3.0
+
+
+class Cancelled(Exception):
+    """Work was abandoned because its phase ended."""
+
+
+class CancelToken:
+    """Cooperative cancellation shared by all work of one UI phase.
+
+    The GUI cancels the token of the old phase when the user navigates
+    away (see advance_phase). Workers check it between chunks, archive
+    members and packages, and wait through wait()/run() so sleeps and
+    subprocesses end early. Pass None where work must never be cancelled
+    (e.g. the tweaker prefetch, which spans phases).
+    """
+
+    def __init__(self) -> None:
+        self._event = threading.Event()
+        self.reason: Optional[str] = None
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self, reason: str = "cancelled") -> None:
+        if not self._event.is_set():
+            self.reason = reason
+            self._event.set()
+
+    def raise_if_cancelled(self) -> None:
+        if self._event.is_set():
+            raise Cancelled(self.reason or "cancelled")
+
+    def wait(self, timeout: float) -> None:
+        """Sleeps up to `timeout` seconds; raises Cancelled on cancel."""
+        if self._event.wait(timeout):
+            raise Cancelled(self.reason or "cancelled")
+
+
+def check(token: Optional[CancelToken]) -> None:
+    """raise_if_cancelled() that accepts None."""
+    if token is not None:
+        token.raise_if_cancelled()
+
+
+def sleep(token: Optional[CancelToken], seconds: float) -> None:
+    """time.sleep() that ends early (with Cancelled) when `token` fires."""
+    if token is None:
+        time.sleep(seconds)
+    else:
+        token.wait(seconds)
+
+
+def run(args: List[str], token: Optional[CancelToken] = None,
+        timeout: Optional[float] = None, **popen_kwargs: Any) -> int:
+    """subprocess.check_call() that terminates the process on cancel.
+
+    Raises:
+        Cancelled: The token fired; the process was terminated (or killed
+            after KILL_GRACE seconds).
+        subprocess.CalledProcessError: Non-zero exit code.
+        subprocess.TimeoutExpired: `timeout` elapsed (process killed).
+    """
+    with subprocess.Popen(args, **popen_kwargs) as proc:
+        waited = 0.0
+        while True:
+            try:
+                rc = proc.wait(timeout=POLL_INTERVAL)
+                break
+            except subprocess.TimeoutExpired:
+                waited += POLL_INTERVAL
+            if token is not None and token.cancelled:
+                proc.terminate()
+                try:
+                    proc.wait(timeout=KILL_GRACE)
+                except subprocess.TimeoutExpired:
+                    proc.kill()
+                    proc.wait()
+                raise Cancelled(token.reason or "cancelled")
+            if timeout is not None and waited >= timeout:
+                proc.kill()
+                proc.wait()
+                raise subprocess.TimeoutExpired(args, timeout)
+    if rc != 0:
+        raise subprocess.CalledProcessError(rc, args)
+    return rc
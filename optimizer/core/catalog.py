@@ -0,0 +1,299 @@
+import copy
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import requests
+
+from . import downloads
+from . import http_client
+from . import retry
+from . import utils
+from .logging_setup import log_event
+
+CORE_DIR = os.path.dirname(os.path.abspath(__file__))
+LINKS_FILE = os.path.join(CORE_DIR, "links.json")
+# Zuletzt geladener Remote-Katalog samt vorberechnetem Index
+CACHE_FILE = os.path.join(CORE_DIR, "catalog.cache.json")
+ENV_VAR = "OPTIMIZER_CATALOG_URL"
+# Bei Änderungen am Index-Format erhöhen; alte Caches werden verworfen
+CATALOG_SCHEMA = 1
+# Nur diese Abschnitte darf ein Remote-Katalog ändern
+REMOTE_KEYS = ("download_urls", "guide_downloads", "choco_apps", "hashes")
+# Ohne diese Einträge ist ein Katalog unbrauchbar
+REQUIRED_DOWNLOADS = ("talon_win10", "talon_win11", "exm_tweaks", "boosterx")
+
+
+def catalog_url(links: Dict[str, Any]) -> Optional[str]:
+    """Remote catalog URL: $OPTIMIZER_CATALOG_URL or links.json "catalog_url".
+
+    Only the local links.json can name it, so a remote catalog cannot
+    redirect later refreshes elsewhere. An empty env value disables it.
+    """
+    env = os.environ.get(ENV_VAR)
+    url = env if env is not None else links.get("catalog_url")
+    return url.strip() if isinstance(url, str) and url.strip() else None
+
+
+def merge(base: Dict[str, Any], remote: Dict[str, Any]) -> Dict[str, Any]:
+    """Overlays a remote catalog on the local links.json.
+
+    Only the REMOTE_KEYS sections are taken over; everything else
+    (admin_password, network, catalog_url, ...) always stays local.
+    Object sections (download_urls, guide_downloads, hashes) are merged
+    per key, so a remote catalog may ship only what changed; choco_apps
+    replaces the local list.
+    """
+    merged = copy.deepcopy(base)
+    for key, value in remote.items():
+        if key not in REMOTE_KEYS:
+            continue
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key].update(value)
+        else:
+            merged[key] = value
+    return merged
+
+
+def validate(links: Dict[str, Any]) -> None:
+    """Raises ValueError if `links` lacks what the wizard needs."""
+    urls = links.get("download_urls")
+    if not isinstance(urls, dict):
+        raise ValueError("download_urls missing")
+    missing = [k for k in REQUIRED_DOWNLOADS
+               if not downloads.parse_entry(urls.get(k))[0]]
+    if missing:
+        raise ValueError(f"download_urls without {', '.join(missing)}")
+    apps = links.get("choco_apps")
+    if not isinstance(apps, list) or not all(
+            isinstance(a, dict) and a.get("key") and a.get("pkg")
+            for a in apps):
+        raise ValueError("choco_apps must be a list of {key, pkg, ...}")
+    for key in ("guide_downloads", "hashes"):
+        if not isinstance(links.get(key, {}), dict):
+            raise ValueError(f"{key} must be an object")
+
+
+def build_index(links: Dict[str, Any]) -> Dict[str, Any]:
+    """Pre-parsed lookups: downloads/tools -> [url, options], apps by key."""
+    return {
+        "downloads": {k: list(downloads.parse_entry(v))
+                      for k, v in links.get("download_urls", {}).items()},
+        "tools": {k: list(downloads.parse_entry(v))
+                  for k, v in links.get("guide_downloads", {}).items()},
+        "apps": {a["key"]: a for a in links.get("choco_apps", [])},
+    }
+
+
+def _changed_keys(old: Dict[str, Any], new: Dict[str, Any]) -> List[str]:
+    """Index entries that differ between two catalogs ("section:key")."""
+    changed = []
+    for section in ("downloads", "tools", "apps"):
+        a, b = old.get(section, {}), new.get(section, {})
+        changed.extend(f"{section}:{k}" for k in sorted(set(a) | set(b))
+                       if a.get(k) != b.get(k))
+    return changed
+
+
+class Catalog:
+    """The effective links.json: local file, optionally overlaid remotely.
+
+    `links` is the merged document, `downloads`/`tools`/`apps` are the
+    pre-built index (see build_index). `origin` tells where it came from:
+    "local", "cache" (catalog.cache.json) or "remote".
+    """
+
+    def __init__(self, links: Dict[str, Any],
+                 index: Optional[Dict[str, Any]] = None,
+                 origin: str = "local",
+                 meta: Optional[Dict[str, Any]] = None,
+                 remote: Optional[Dict[str, Any]] = None) -> None:
+        self.links = links
+        index = index or build_index(links)
+        self.downloads: Dict[str, List[Any]] = index["downloads"]
+        self.tools: Dict[str, List[Any]] = index["tools"]
+        self.apps: Dict[str, Dict[str, Any]] = index["apps"]
+        self.origin = origin
+        # url, etag, last_modified, fetched_at des Remote-Katalogs
+        self.meta: Dict[str, Any] = meta or {}
+        # Unveränderter Remote-Teil (für erneutes Mergen), sonst None
+        self.remote: Optional[Dict[str, Any]] = remote
+
+    @property
+    def index(self) -> Dict[str, Any]:
+        return {"downloads": self.downloads, "tools": self.tools,
+                "apps": self.apps}
+
+    def download(self, key: str) -> Tuple[Optional[str], Dict[str, Any]]:
+        """(url, options) of a download_urls entry."""
+        url, opts = self.downloads.get(key) or (None, {})
+        return url, dict(opts)
+
+    def tool(self, name: str) -> Tuple[Optional[str], Dict[str, Any]]:
+        """(url, options) of a guide_downloads entry."""
+        url, opts = self.tools.get(name) or (None, {})
+        return url, dict(opts)
+
+
+def _read_local(path: str = LINKS_FILE) -> Dict[str, Any]:
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _read_cache(url: str, path: str = CACHE_FILE) -> Optional[Dict[str, Any]]:
+    """The cached catalog for `url`, None if missing/outdated/foreign."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(data, dict) or data.get("schema") != CATALOG_SCHEMA \
+            or data.get("url") != url:
+        return None
+    if not all(isinstance(data.get(k), dict)
+               for k in ("remote", "links", "index")):
+        return None
+    return data
+
+
+def _write_cache(data: Dict[str, Any], path: str = CACHE_FILE) -> None:
+    tmp = path + ".tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+def load(links_path: str = LINKS_FILE,
+         cache_path: str = CACHE_FILE) -> Catalog:
+    """Builds the catalog for startup without network access.
+
+    With a catalog URL and a matching cache (same URL and schema) the
+    cached document and index are used as-is. If links.json changed since
+    (e.g. a new release), the cached remote part is merged over it again.
+    Otherwise the local links.json is used.
+    """
+    local = _read_local(links_path)
+    url = catalog_url(local)
+    cached = _read_cache(url, cache_path) if url else None
+    if cached is None:
+        return Catalog(local, meta={"url": url} if url else None)
+    meta = {k: cached.get(k)
+            for k in ("url", "etag", "last_modified", "fetched_at")}
+    if cached.get("local_stamp") == utils.file_stamp(links_path):
+        return Catalog(cached["links"], cached["index"], "cache", meta,
+                       cached["remote"])
+    links = merge(local, cached["remote"])
+    try:
+        validate(links)
+    except ValueError:
+        return Catalog(local, meta={"url": url})
+    return Catalog(links, origin="cache", meta=meta,
+                   remote=cached["remote"])
+
+
+_catalog: Optional[Catalog] = None
+_catalog_lock = threading.Lock()
+# Nur eine Aktualisierung gleichzeitig
+_refresh_lock = threading.Lock()
+
+
+def get_catalog() -> Catalog:
+    """Returns the process-wide catalog (loaded lazily, see load())."""
+    global _catalog
+    with _catalog_lock:
+        if _catalog is None:
+            _catalog = load()
+        return _catalog
+
+
+def refresh(log: Optional[Any] = None, links_path: str = LINKS_FILE,
+            cache_path: str = CACHE_FILE) -> str:
+    """Fetches the remote catalog conditionally and swaps it in.
+
+    Sends the cached ETag/Last-Modified, so an unchanged catalog costs one
+    304. The remote document is merged over the local links.json,
+    validated, indexed and written to the cache before it replaces
+    get_catalog(); changed index entries are logged. Never raises.
+
+    Returns:
+        "disabled", "busy", "not_modified", "updated", "unchanged" or
+        "failed".
+    """
+    global _catalog
+    if not _refresh_lock.acquire(blocking=False):
+        return "busy"
+    try:
+        current = get_catalog()
+        url = None
+        t0 = time.time()
+        try:
+            local = _read_local(links_path)
+            url = catalog_url(local)
+            if not url:
+                return "disabled"
+            known = current.remote is not None and \
+                current.meta.get("url") == url
+            headers = {}
+            if known and current.meta.get("etag"):
+                headers["If-None-Match"] = current.meta["etag"]
+            if known and current.meta.get("last_modified"):
+                headers["If-Modified-Since"] = current.meta["last_modified"]
+            session = http_client.get_session()
+
+            def _get() -> requests.Response:
+                r = session.get(url, headers=headers,
+                                timeout=http_client.TIMEOUT)
+                if r.status_code != 304:
+                    r.raise_for_status()
+                return r
+
+            r = retry.call(_get, "catalog_fetch", key=downloads.host_of(url),
+                           log=log, attempts=2, url=url)
+            not_modified = r.status_code == 304 and known
+            if not_modified:
+                remote = current.remote
+                meta = dict(current.meta, fetched_at=time.time())
+            else:
+                remote = r.json()
+                if not isinstance(remote, dict):
+                    raise ValueError("catalog is not a JSON object")
+                meta = {"url": url, "etag": r.headers.get("ETag"),
+                        "last_modified": r.headers.get("Last-Modified"),
+                        "fetched_at": time.time()}
+            # Auch bei 304 neu mergen: links.json kann sich geändert haben
+            links = merge(local, remote)
+            validate(links)
+            index = build_index(links)
+        except Exception as e:
+            if log is not None:
+                log_event(log, "catalog_fail", url=url,
+                          err=f"{type(e).__name__}: {e}")
+            return "failed"
+        try:
+            _write_cache({"schema": CATALOG_SCHEMA, **meta,
+                          "local_stamp": utils.file_stamp(links_path),
+                          "remote": remote, "links": links,
+                          "index": index}, cache_path)
+        except OSError as e:
+            if log is not None:
+                log_event(log, "catalog_cache_fail", err=str(e))
+        changed = _changed_keys(current.index, index)
+        with _catalog_lock:
+            _catalog = Catalog(links, index, "remote", meta, remote)
+        if log is not None:
+            log_event(log, "catalog_not_modified" if not_modified
+                      else "catalog_updated", url=url, changed=changed,
+                      seconds=round(time.time() - t0, 2))
+        if not_modified:
+            return "not_modified"
+        return "updated" if changed else "unchanged"
+    finally:
+        _refresh_lock.release()
+
+
+def refresh_async(log: Optional[Any] = None) -> None:
+    """refresh() in a daemon thread (startup must not wait for it)."""
+    threading.Thread(target=refresh, args=(log,), daemon=True,
+                     name="catalog-refresh").start()
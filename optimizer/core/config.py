@@ -41,6 +41,7 @@ def load_status(app: Any) -> None:
             app.current_phase = st.get(
                 'current_phase', getattr(app, 'current_phase', None)
             )
+            app.tweaker_prefetch = st.get('tweaker_prefetch', {})
             log_event(
                 PhaseLoggerAdapter(
                     logging.getLogger("optimizer"),
@@ -78,7 +79,8 @@ def save_status(app: Any) -> None:
         'apps_phase_done': app.apps_phase_done,
         'restore_last_action': app.restore_last_action,
         'restore_last_point': app.restore_last_point,
-        'current_phase': getattr(app, 'current_phase', None)
+        'current_phase': getattr(app, 'current_phase', None),
+        'tweaker_prefetch': getattr(app, 'tweaker_prefetch', {})
     }
     try:
         with open(CONFIG_FILE, 'w', encoding='utf-8') as f:
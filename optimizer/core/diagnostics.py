@@ -4,7 +4,6 @@ import platform
 import getpass
 import shutil
 import subprocess
-import requests
 import threading
 import re  # Added for Windows version detection
 
@@ -15,6 +14,7 @@ from datetime import datetime
 from .logging_setup import log_event, setup_diagnostics_logging, log_diagnostic
 from . import uac
 from . import operations
+from . import http_client
 
 
 def run_diagnostics(app):
@@ -243,7 +243,8 @@ def run_diagnostics(app):
             for key, url in app.download_urls.items():
                 try:
                     t0 = time.time()
-                    r = requests.head(url, timeout=5, allow_redirects=True)
+                    r = http_client.get_session().head(
+                        url, timeout=(5, 5), allow_redirects=True)
                     dt = round(time.time() - t0, 2)
                     log_diagnostic(
                         diag_logger,
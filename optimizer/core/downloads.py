@@ -0,0 +1,1174 @@
+import hashlib
+import http.client
+import json
+import os
+import socket
+import threading
+import time
+import zipfile
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from dataclasses import dataclass, replace
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import quote, urlsplit
+
+import requests
+from urllib3.exceptions import ProtocolError, ReadTimeoutError
+
+from . import artifact_cache
+from . import cancel as cancel_mod
+from . import http_client
+from . import lockfile
+from . import progress as progress_mod
+from . import ratelimit
+from . import retry
+from . import utils
+from .logging_setup import log_event
+
+# Globales Limit gleichzeitiger Transfers und Limit pro Host
+MAX_WORKERS = 4
+PER_HOST_LIMIT = 2
+# Lesepuffer: Startgröße, passt sich an den Durchsatz an (min..max)
+CHUNK_START = 64 * 1024
+CHUNK_MIN = 16 * 1024
+CHUNK_MAX = 4 * 1024 * 1024
+# Teil-Downloads: <ziel>.part plus Sidecar <ziel>.part.json (Validator/Offset)
+PART_SUFFIX = ".part"
+SIDECAR_SUFFIX = ".part.json"
+SIDECAR_INTERVAL = 1024 * 1024
+# Segmentierter Modus (pro Eintrag in links.json aktivierbar)
+SEGMENT_THRESHOLD_MB = 16
+# Cache-Einträge älter als das werden per ETag/If-Modified-Since geprüft
+REVALIDATE_AFTER = 6 * 3600
+MAX_SEGMENTS = 8
+# Spiegel: Probe-Größe fürs Rennen
+PROBE_BYTES = 64 * 1024
+PROBE_TIMEOUT = (5, 5)
+# LAN-Cache (peer_cache): kurze Timeouts, ein toter Peer darf nicht bremsen
+PEER_TIMEOUT = (2, 5)
+# Aufwärmen: höchstens so viele Hosts gleichzeitig
+WARMUP_WORKERS = 8
+# Stall-Watchdog: Abbruch, wenn der Durchsatz STALL_SECONDS lang unter
+# STALL_MIN_KBPS bleibt (links.json "network" bzw. Env überschreibt; 0 = aus)
+STALL_MIN_KBPS = 32
+STALL_SECONDS = 20
+
+
+@dataclass
+class DownloadResult:
+    """Outcome of a single transfer (sha256 is computed while streaming)."""
+    url: str
+    dest: str
+    bytes: int = 0
+    seconds: float = 0.0
+    resumed_from: int = 0
+    segments: int = 1
+    from_cache: bool = False
+    sha256: Optional[str] = None
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    not_modified: bool = False
+    source: Optional[str] = None
+    failovers: int = 0
+    joined: bool = False
+    # Ziel nach Redirects (None bei Cache-Treffern/304)
+    final_url: Optional[str] = None
+
+
+def host_of(url: str) -> str:
+    """Returns the lower-case host part of a URL ('' if unparsable)."""
+    try:
+        return (urlsplit(url).hostname or "").lower()
+    except Exception:
+        return ""
+
+
+def parse_entry(entry: Any) -> Tuple[Optional[str], Dict[str, Any]]:
+    """Splits a links.json download entry into (url, options).
+
+    Entries are either a plain URL string or an object such as
+    {"url": "...", "segments": 4, "segment_threshold_mb": 16}.
+    "mirrors": [...] lists alternative URLs for the same file; fetch()
+    races them and fails over between them. A partial file is continued
+    from another mirror only with a known hash ("sha256" or links.lock, see
+    expected_sha256), otherwise failover starts from byte 0.
+    Zip entries may add "extract_members": ["*.exe", "*.dll"] to limit
+    extraction (see extract.select_members); with "remote_extract": true
+    only those members are fetched via Range requests (see remote_zip).
+    """
+    if isinstance(entry, dict):
+        opts = {k: v for k, v in entry.items() if k != "url"}
+        return entry.get("url"), opts
+    return entry, {}
+
+
+def expected_sha256(url: str, opts: Dict[str, Any]) -> str:
+    """Trusted SHA-256 for `url` (lower-case hex, "" if unknown).
+
+    Taken from options["sha256"] (links.json/hashes, optionally
+    "sha256:<hex>"), otherwise from the links.lock entry for that URL.
+    """
+    expected = (opts.get("sha256") or "").split(":")[-1].strip().lower()
+    return expected or (lockfile.get_lock().sha256_for(url) or "").lower()
+
+
+def copy_stream(r: requests.Response, f: Any, limit: Optional[int] = None,
+                on_chunk: Optional[Callable[[memoryview], None]] = None,
+                throttle: Optional[Callable[[int], None]] = None) -> int:
+    """Copies the body of a streamed response into the open file `f`.
+
+    Reads straight from the raw stream instead of going through 8 KiB
+    iter_content chunks. urllib3's read1() returns after a single socket
+    read (chunked bodies: at most up to the next chunk boundary), so a
+    collapsing link is noticed at once; urllib3 keeps its own length
+    checks. Without read1() (urllib3 < 2) read() is used. The read size
+    starts at CHUNK_START and doubles while reads come back at least half
+    full and fast, or halves when a single read takes long, so slow links
+    still report progress regularly. `on_chunk` sees every written slice
+    (hashing, progress, sidecar).
+    `throttle` is called with each chunk size and may sleep (see
+    ratelimit.Shaper); its delay counts towards the read time, so shaped
+    links use small reads.
+
+    Returns:
+        Number of bytes written (at most `limit`).
+    """
+    encoding = r.headers.get("Content-Encoding", "").lower()
+    if encoding not in ("", "identity") or not hasattr(r.raw, "read"):
+        # Komprimierte Antworten brauchen die Dekodierung von iter_content
+        total = 0
+        for chunk in r.iter_content(CHUNK_START):
+            if limit is not None:
+                chunk = chunk[:limit - total]
+            if not chunk:
+                continue
+            f.write(chunk)
+            if on_chunk is not None:
+                on_chunk(memoryview(chunk))
+            if throttle is not None:
+                throttle(len(chunk))
+            total += len(chunk)
+            if limit is not None and total >= limit:
+                break
+        return total
+
+    total = 0
+    size = CHUNK_START
+    read = getattr(r.raw, "read1", None) or r.raw.read
+    while limit is None or total < limit:
+        want = size if limit is None else min(size, limit - total)
+        t0 = time.monotonic()
+        try:
+            data = read(want, decode_content=False)
+        except (ProtocolError, http.client.HTTPException) as e:
+            # Gleiche Fehlertypen wie iter_content
+            raise requests.exceptions.ChunkedEncodingError(e)
+        except (ReadTimeoutError, socket.timeout) as e:
+            raise requests.exceptions.ConnectionError(e)
+        except OSError as e:
+            # z.B. Verbindung vom Server zurückgesetzt
+            raise requests.exceptions.ChunkedEncodingError(e)
+        if not data:
+            break
+        n = len(data)
+        f.write(data)
+        if on_chunk is not None:
+            on_chunk(memoryview(data))
+        if throttle is not None:
+            throttle(n)
+        elapsed = time.monotonic() - t0
+        total += n
+        if 2 * n >= want and elapsed < 0.05 and size < CHUNK_MAX:
+            size *= 2
+        elif elapsed > 0.5 and size > CHUNK_MIN:
+            size //= 2
+    return total
+
+
+def _with_hooks(throttle: Callable[[int], None],
+                progress: Optional[progress_mod.ItemProgress],
+                cancel: Optional[cancel_mod.CancelToken]
+                ) -> Callable[[int], None]:
+    """Per-chunk hook: cancel check, progress, then the shaper."""
+    if progress is None and cancel is None:
+        return throttle
+
+    def _hook(n: int) -> None:
+        if cancel is not None:
+            cancel.raise_if_cancelled()
+        if progress is not None:
+            progress.advance(n)
+        throttle(n)
+
+    return _hook
+
+
+class TransferStalled(requests.exceptions.ConnectionError):
+    """Throughput stayed below the stall floor for a whole window.
+
+    A ConnectionError, so retry/resume and mirror failover treat it like a
+    dropped connection; the .part file is kept.
+    """
+
+
+class _StallWatchdog:
+    """Windowed throughput check for one transfer (or one segment).
+
+    After every chunk the bytes of the current window are compared with
+    `min_bps` once `window` seconds have passed; below it, `on_stall` is
+    called and TransferStalled raised. Time spent sleeping in the bandwidth
+    shaper is excluded, so deliberate throttling never counts as a stall.
+    A connection that delivers nothing at all is caught by the read
+    timeout, which the manager sets to the same window.
+    """
+
+    def __init__(self, min_bps: float, window: float,
+                 on_stall: Optional[Callable[[float, float], None]] = None
+                 ) -> None:
+        self.min_bps = min_bps
+        self.window = window
+        self.on_stall = on_stall
+        self.paused = 0.0
+        self._start = time.monotonic()
+        self._bytes = 0
+
+    def add(self, n: int) -> None:
+        self._bytes += n
+        active = time.monotonic() - self._start - self.paused
+        if active < self.window:
+            return
+        rate = self._bytes / active
+        if rate < self.min_bps:
+            if self.on_stall is not None:
+                self.on_stall(rate, active)
+            raise TransferStalled(
+                f"Stalled: {rate / 1024:.1f} KiB/s over {int(active)}s")
+        self._start, self._bytes, self.paused = time.monotonic(), 0, 0.0
+
+    def wrap(self, throttle: Optional[Callable[[int], None]]
+             ) -> Optional[Callable[[int], None]]:
+        if throttle is None:
+            return None
+
+        def _throttle(n: int) -> None:
+            t0 = time.monotonic()
+            throttle(n)
+            self.paused += time.monotonic() - t0
+
+        return _throttle
+
+
+class RangeNotSupported(Exception):
+    """Server ignored a Range request during a segmented transfer."""
+
+
+def _load_sidecar(dest: str) -> Dict[str, Any]:
+    try:
+        with open(dest + SIDECAR_SUFFIX, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except Exception:
+        return {}
+
+
+def _save_sidecar(dest: str, meta: Dict[str, Any]) -> None:
+    tmp = dest + SIDECAR_SUFFIX + ".tmp"
+    try:
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        os.replace(tmp, dest + SIDECAR_SUFFIX)
+    except OSError:
+        pass
+
+
+def discard_partial(dest: str) -> None:
+    """Removes a stale .part file and its sidecar for `dest`."""
+    for path in (dest + PART_SUFFIX, dest + SIDECAR_SUFFIX):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def _resume_validator(meta: Dict[str, Any]) -> Optional[str]:
+    """If-Range needs a strong ETag; otherwise fall back to Last-Modified."""
+    etag = meta.get("etag")
+    if etag and not etag.startswith("W/"):
+        return etag
+    return meta.get("last_modified")
+
+
+def _same_validators(info: Dict[str, Any], known: Dict[str, Any]) -> bool:
+    """True if a probe response still matches the cached validators."""
+    if info.get("etag") and known.get("etag"):
+        return info["etag"] == known["etag"]
+    if info.get("last_modified") and known.get("last_modified"):
+        return info["last_modified"] == known["last_modified"]
+    return False
+
+
+def _total_from_response(r: requests.Response, offset: int) -> Optional[int]:
+    crange = r.headers.get("Content-Range", "")
+    if "/" in crange:
+        total = crange.rsplit("/", 1)[1].strip()
+        if total.isdigit():
+            return int(total)
+    length = r.headers.get("Content-Length")
+    if length and length.isdigit():
+        return offset + int(length)
+    return None
+
+
+class DownloadManager:
+    """Shared limits, cache and session for all file transfers.
+
+    Concurrency:
+        At most `max_workers` transfers run at the same time, and at most
+        `per_host` of them against the same host, no matter which thread
+        calls `fetch()` (download pipeline, prefetch, UI callbacks).
+    """
+
+    def __init__(self, max_workers: int = MAX_WORKERS,
+                 per_host: int = PER_HOST_LIMIT,
+                 session: Optional[requests.Session] = None,
+                 cache: Optional[artifact_cache.ArtifactCache] = None,
+                 shaper: Optional[ratelimit.Shaper] = None) -> None:
+        self.max_workers = max(1, int(max_workers))
+        self.per_host = max(1, int(per_host))
+        self._global_slots = threading.BoundedSemaphore(self.max_workers)
+        self._host_slots: Dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+        self.session = session or http_client.get_session()
+        self.cache = cache
+        self.shaper = shaper or ratelimit.Shaper(**ratelimit.settings_from())
+        # Single-Flight: (url, Ziel) -> Future des laufenden Transfers
+        self._inflight: Dict[Tuple[str, str], Future] = {}
+        # Offline-Bundle (bundle.mount); bedient URLs ohne Netzwerk
+        self.bundle: Optional[Any] = None
+        # LAN-Peers (peer_cache.PeerServer), werden vor dem Upstream gefragt
+        self.peers: List[str] = []
+        self.stall_min_kbps = float(STALL_MIN_KBPS)
+        self.stall_seconds = float(STALL_SECONDS)
+        # Logger (PhaseLoggerAdapter) für Stall-Events, siehe configure_network
+        self.log: Optional[Any] = None
+
+    def _watchdog(self, url: str) -> Optional[_StallWatchdog]:
+        if self.stall_min_kbps <= 0 or self.stall_seconds <= 0:
+            return None
+        host = host_of(url)
+
+        def _on_stall(rate: float, window: float) -> None:
+            if self.log is not None:
+                log_event(self.log, "download_stall", host=host, url=url,
+                          kbps=round(rate / 1024, 1),
+                          floor_kbps=self.stall_min_kbps,
+                          window_s=round(window, 1))
+
+        return _StallWatchdog(self.stall_min_kbps * 1024, self.stall_seconds,
+                              _on_stall)
+
+    def _timeout(self):
+        """(connect, read) timeout; read never exceeds the stall window."""
+        if self.stall_min_kbps <= 0 or self.stall_seconds <= 0:
+            return http_client.TIMEOUT
+        return (http_client.CONNECT_TIMEOUT,
+                min(http_client.READ_TIMEOUT, self.stall_seconds))
+
+    def _host_slot(self, host: str) -> threading.BoundedSemaphore:
+        with self._lock:
+            slot = self._host_slots.get(host)
+            if slot is None:
+                slot = threading.BoundedSemaphore(self.per_host)
+                self._host_slots[host] = slot
+            return slot
+
+    def fetch(self, url: str, dest: str,
+              options: Optional[Dict[str, Any]] = None,
+              priority: str = ratelimit.FOREGROUND,
+              progress: Optional[progress_mod.ItemProgress] = None,
+              cancel: Optional[cancel_mod.CancelToken] = None
+              ) -> DownloadResult:
+        """Streams `url` into `dest` (blocking) within the pool limits.
+
+        URLs in the artifact cache are materialized without any network
+        access while younger than REVALIDATE_AFTER; older entries cost one
+        conditional request (304 -> cached copy). Fresh downloads are added
+        to the cache.
+        URLs a mounted bundle contains are copied from it; without a cache
+        entry, configured LAN peers are asked next, but only for URLs with a
+        trusted hash (options["sha256"] or links.lock, see _from_peer).
+        Interrupted transfers continue from `dest`.part on the next call.
+        With options["segments"] > 1 large files are fetched as parallel
+        byte ranges when the server supports it (see parse_entry()).
+        With options["mirrors"] all sources are raced first (rank_sources)
+        and a transfer that stalls (see _StallWatchdog) or fails moves on
+        to the next one, keeping the partial file.
+        `priority` selects the bandwidth class (ratelimit.FOREGROUND for
+        phase downloads, ratelimit.BACKGROUND for prefetch/repairs).
+        `progress` receives the expected size and every received chunk.
+        A second call for the same URL and target while the first is still
+        running does not start another transfer; it waits and gets a copy
+        of the same result (joined=True) or the same exception. If the
+        first call was cancelled by its own token, a waiting call whose
+        token is still live takes over and runs the transfer itself.
+        A cancelled `cancel` token stops the transfer after the current
+        chunk (bounded by the read timeout); the .part file is kept.
+
+        Raises:
+            requests.RequestException: On HTTP/network errors.
+            cancel.Cancelled: If `cancel` fired.
+            OSError: If the target cannot be written.
+        """
+        key = (url, os.path.normcase(os.path.abspath(dest)))
+        while True:
+            with self._lock:
+                flight = self._inflight.get(key)
+                leader = flight is None
+                if leader:
+                    flight = self._inflight[key] = Future()
+            if leader:
+                break
+            try:
+                return replace(self._join(flight, cancel), joined=True)
+            except cancel_mod.Cancelled:
+                if cancel is not None and cancel.cancelled:
+                    raise
+                # Nur der Leader wurde abgebrochen -> selbst übernehmen
+
+        try:
+            result = self._fetch(url, dest, options, priority, progress,
+                                 cancel)
+        except BaseException as e:
+            # Erst austragen, damit übernehmende Aufrufer neu starten können
+            with self._lock:
+                self._inflight.pop(key, None)
+            flight.set_exception(e)
+            raise
+        with self._lock:
+            self._inflight.pop(key, None)
+        flight.set_result(result)
+        return result
+
+    @staticmethod
+    def _join(flight: Future,
+              cancel: Optional[cancel_mod.CancelToken]) -> DownloadResult:
+        """Waits for a running transfer; ends early if `cancel` fires."""
+        while cancel is not None:
+            cancel.raise_if_cancelled()
+            try:
+                return flight.result(timeout=cancel_mod.POLL_INTERVAL)
+            except FutureTimeout:
+                continue
+        return flight.result()
+
+    def _fetch(self, url: str, dest: str,
+               options: Optional[Dict[str, Any]],
+               priority: str,
+               progress: Optional[progress_mod.ItemProgress],
+               cancel: Optional[cancel_mod.CancelToken] = None
+               ) -> DownloadResult:
+        """fetch() without single-flight deduplication."""
+        known = None
+        if self.cache is not None:
+            entry = self.cache.lookup(url)
+            if entry and self.cache.is_fresh(entry, REVALIDATE_AFTER) and \
+                    self.cache.materialize(entry["sha256"], dest):
+                # Frischer Treffer im Artefakt-Cache: kein Netzwerkzugriff
+                discard_partial(dest)
+                return self._cached_result(url, dest, entry)
+            # Veraltete Einträge werden per bedingtem Request geprüft
+            known = entry
+        if self.bundle is not None:
+            bundled = self._from_bundle(url, dest, progress, cancel)
+            if bundled is not None:
+                return bundled
+        opts = options or {}
+        # Peers nur ohne eigenen (veralteten) Eintrag: der wird upstream
+        # per bedingtem Request geprüft, das ist billiger. Ohne bekannten
+        # Hash wäre jede Peer-Kopie ungeprüft -> dann direkt upstream.
+        expected = expected_sha256(url, opts) \
+            if self.peers and known is None else ""
+        if expected:
+            for peer in self.peers:
+                from_peer = self._from_peer(peer, url, dest, expected,
+                                            priority, progress, cancel)
+                if from_peer is not None:
+                    return from_peer
+
+        sources = [url] + [m for m in (opts.get("mirrors") or [])
+                           if m and m != url]
+        if len(sources) > 1:
+            sources = self.rank_sources(sources)
+        host = host_of(sources[0])
+        host_slot = self._host_slot(host)
+        throttle = _with_hooks(self.shaper.throttle_for(host, priority),
+                               progress, cancel)
+        # Reihenfolge global -> Host ist fest, damit kein Deadlock entsteht
+        with self._global_slots, host_slot:
+            # Während des Wartens auf einen Slot abgebrochen?
+            cancel_mod.check(cancel)
+            t0 = time.time()
+            utils.ensure_dir(os.path.dirname(dest) or ".")
+            self.shaper.begin(priority)
+            try:
+                result = self._download(url, dest, opts, known, throttle,
+                                        sources, progress)
+                if result.not_modified and not self.cache.materialize(
+                        known["sha256"], dest):
+                    # Objekt zwischenzeitlich verdrängt -> vollständig laden
+                    result = self._download(url, dest, opts, None, throttle,
+                                            sources, progress)
+            finally:
+                self.shaper.end(priority)
+            result.seconds = round(time.time() - t0, 2)
+
+        if result.not_modified:
+            self.cache.mark_verified(url)
+            discard_partial(dest)
+            cached = self._cached_result(url, dest, known)
+            cached.not_modified = True
+            cached.seconds = result.seconds
+            return cached
+        if self.cache is not None:
+            try:
+                result.sha256 = self.cache.store(
+                    dest, url, result.etag, result.last_modified,
+                    sha256=result.sha256, source=result.source)
+            except OSError:
+                pass
+        return result
+
+    def _from_bundle(self, url: str, dest: str,
+                     progress: Optional[progress_mod.ItemProgress],
+                     cancel: Optional[cancel_mod.CancelToken]
+                     ) -> Optional[DownloadResult]:
+        """Serves `url` from the mounted offline bundle (None if absent)."""
+        entry = self.bundle.lookup(url)
+        if entry is None:
+            return None
+        t0 = time.time()
+        if progress is not None:
+            progress.start(entry["size"])
+        try:
+            sha256 = self.bundle.materialize(
+                entry, dest,
+                on_chunk=progress.advance if progress is not None else None,
+                cancel=cancel)
+        except (OSError, ValueError, zipfile.BadZipFile) as e:
+            # Defektes Bundle: normal über das Netzwerk laden
+            if self.log is not None:
+                log_event(self.log, "bundle_read_fail", url=url, err=str(e))
+            return None
+        discard_partial(dest)
+        if self.cache is not None:
+            try:
+                self.cache.store(dest, url, entry.get("etag"),
+                                 entry.get("last_modified"), sha256=sha256)
+            except OSError:
+                pass
+        return DownloadResult(
+            url=url, dest=dest, bytes=entry["size"], from_cache=True,
+            seconds=round(time.time() - t0, 2), sha256=sha256,
+            etag=entry.get("etag"), last_modified=entry.get("last_modified"),
+            source=f"bundle:{entry['name']}")
+
+    def _from_peer(self, peer: str, url: str, dest: str, expected: str,
+                   priority: str,
+                   progress: Optional[progress_mod.ItemProgress],
+                   cancel: Optional[cancel_mod.CancelToken]
+                   ) -> Optional[DownloadResult]:
+        """Fetches `url` from a LAN peer's artifact cache (None on miss).
+
+        The peer maps the URL to a digest (/lookup); only if that equals
+        `expected` (the trusted hash, see expected_sha256) is the object
+        streamed like any other transfer (resume, watchdog, shaping), and
+        the received bytes must hash to `expected` as well. Unreachable
+        peers are skipped via the circuit breaker after a few failures.
+        """
+        peer = peer.rstrip("/")
+        key = f"peer:{host_of(peer)}"
+        try:
+            retry.breaker.before(key)
+            r = self.session.get(f"{peer}/lookup?url={quote(url, safe='')}",
+                                 timeout=PEER_TIMEOUT)
+            if r.status_code == 404:
+                retry.breaker.success(key)
+                return None
+            r.raise_for_status()
+            entry = r.json()
+            offered = str(entry["sha256"]).lower()
+        except (retry.CircuitOpen, requests.RequestException, ValueError,
+                KeyError, TypeError) as e:
+            if not isinstance(e, retry.CircuitOpen):
+                retry.breaker.failure(key)
+                if self.log is not None:
+                    log_event(self.log, "peer_fail", peer=peer, url=url,
+                              err=f"{type(e).__name__}: {e}")
+            return None
+        if offered != expected:
+            # Peer hat eine andere Version (oder lügt) -> nicht verwenden
+            retry.breaker.success(key)
+            if self.log is not None:
+                log_event(self.log, "peer_untrusted", peer=peer, url=url,
+                          expected=expected, offered=offered)
+            return None
+
+        source = f"{peer}/objects/{expected}"
+        host = host_of(source)
+        throttle = _with_hooks(self.shaper.throttle_for(host, priority),
+                               progress, cancel)
+        with self._global_slots, self._host_slot(host):
+            cancel_mod.check(cancel)
+            t0 = time.time()
+            utils.ensure_dir(os.path.dirname(dest) or ".")
+            self.shaper.begin(priority)
+            try:
+                written, resumed_from, meta = self._transfer(
+                    source, dest, throttle=throttle,
+                    floor=self._watchdog(source), progress=progress)
+            except requests.RequestException as e:
+                discard_partial(dest)
+                retry.breaker.failure(key)
+                if self.log is not None:
+                    log_event(self.log, "peer_fail", peer=peer, url=url,
+                              err=f"{type(e).__name__}: {e}")
+                return None
+            finally:
+                self.shaper.end(priority)
+        if meta["sha256"] != expected:
+            # Defekte Kopie beim Peer -> regulär upstream laden
+            os.remove(dest)
+            if self.log is not None:
+                log_event(self.log, "peer_hash_mismatch", peer=peer, url=url,
+                          expected=expected, actual=meta["sha256"])
+            return None
+        retry.breaker.success(key)
+        if self.cache is not None:
+            try:
+                self.cache.store(dest, url, entry.get("etag"),
+                                 entry.get("last_modified"),
+                                 sha256=meta["sha256"])
+            except OSError:
+                pass
+        return DownloadResult(
+            url=url, dest=dest, bytes=written, resumed_from=resumed_from,
+            seconds=round(time.time() - t0, 2), sha256=meta["sha256"],
+            etag=entry.get("etag"), last_modified=entry.get("last_modified"),
+            source=f"peer:{peer}")
+
+    def rank_sources(self, sources: List[str]) -> List[str]:
+        """Orders mirrors by how fast a small ranged GET completes.
+
+        All probes run in parallel; unreachable mirrors go to the end but
+        stay in the list as a last resort.
+        """
+        def _probe_time(src: str) -> Optional[float]:
+            t0 = time.monotonic()
+            try:
+                with self.session.get(
+                        src, stream=True, timeout=PROBE_TIMEOUT,
+                        headers={**http_client.IDENTITY,
+                                 "Range": f"bytes=0-{PROBE_BYTES - 1}"}) as r:
+                    if r.status_code not in (200, 206):
+                        return None
+                    got = 0
+                    for chunk in r.iter_content(16 * 1024):
+                        got += len(chunk)
+                        if got >= PROBE_BYTES:
+                            break
+                return time.monotonic() - t0
+            except requests.RequestException:
+                return None
+
+        with ThreadPoolExecutor(max_workers=len(sources),
+                                thread_name_prefix="dl-race") as pool:
+            times = list(pool.map(_probe_time, sources))
+        order = sorted(range(len(sources)),
+                       key=lambda i: (times[i] is None, times[i] or 0.0, i))
+        return [sources[i] for i in order]
+
+    def warm_up(self, urls: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Pre-resolves and pre-connects to the hosts of `urls` (blocking).
+
+        One HEAD per origin (following redirects, so CDN targets are warmed
+        too) leaves a keep-alive connection in the session pool; the first
+        real request then skips DNS, TCP and TLS setup. A second HEAD on
+        the warm connection gives the saved setup time (cold - warm). URLs
+        the mounted bundle serves are skipped. Servers drop idle
+        connections eventually; urllib3 then reconnects transparently.
+
+        Returns:
+            origin (scheme://host:port) -> {"dns_ms", "cold_ms", "warm_ms",
+            "saved_ms"}, or {"err": ...} if the host could not be reached.
+        """
+        first: Dict[str, str] = {}
+        for url in urls:
+            if not url or (self.bundle is not None and self.bundle.lookup(url)):
+                continue
+            # Ein Pool je Schema/Host/Port (wie in urllib3)
+            parts = urlsplit(url)
+            if parts.hostname:
+                first.setdefault(f"{parts.scheme}://{parts.netloc.lower()}",
+                                 url)
+
+        def _head(url: str) -> float:
+            t0 = time.monotonic()
+            self.session.head(url, allow_redirects=True,
+                              timeout=PROBE_TIMEOUT).close()
+            return (time.monotonic() - t0) * 1000
+
+        def _warm(origin: str) -> Dict[str, Any]:
+            url = first[origin]
+            parts = urlsplit(url)
+            try:
+                t0 = time.monotonic()
+                # Füllt nebenbei den DNS-Cache des Systems
+                socket.getaddrinfo(parts.hostname, parts.port or (
+                    443 if parts.scheme == "https" else 80),
+                    type=socket.SOCK_STREAM)
+                dns_ms = (time.monotonic() - t0) * 1000
+                cold_ms = _head(url)
+                warm_ms = _head(url)
+            except (OSError, requests.RequestException) as e:
+                return {"err": f"{type(e).__name__}: {e}"}
+            return {"dns_ms": round(dns_ms, 1), "cold_ms": round(cold_ms, 1),
+                    "warm_ms": round(warm_ms, 1),
+                    "saved_ms": round(max(0.0, cold_ms - warm_ms), 1)}
+
+        if not first:
+            return {}
+        with ThreadPoolExecutor(max_workers=min(WARMUP_WORKERS, len(first)),
+                                thread_name_prefix="dl-warm") as pool:
+            results = dict(zip(first, pool.map(_warm, first)))
+        if self.log is not None:
+            for origin, info in results.items():
+                log_event(self.log, "connection_warm_fail" if "err" in info
+                          else "connection_warm", origin=origin, **info)
+        return results
+
+    @staticmethod
+    def _cached_result(url: str, dest: str,
+                       entry: Dict[str, Any]) -> DownloadResult:
+        return DownloadResult(
+            url=url, dest=dest, bytes=entry["size"], from_cache=True,
+            sha256=entry["sha256"], etag=entry.get("etag"),
+            last_modified=entry.get("last_modified"))
+
+    def _download(self, url: str, dest: str, opts: Dict[str, Any],
+                  known: Optional[Dict[str, Any]],
+                  throttle: Optional[Callable[[int], None]] = None,
+                  sources: Optional[List[str]] = None,
+                  progress: Optional[progress_mod.ItemProgress] = None
+                  ) -> DownloadResult:
+        """Network part of fetch(); `known` holds validators to revalidate.
+
+        `sources` are tried in order (ranked mirrors, `url` if omitted).
+        """
+        sources = sources or [url]
+        # Validatoren gelten nur für die Quelle, von der sie stammen
+        known_src = (known.get("source") or url) if known else None
+        start = 0
+        segments = min(int(opts.get("segments") or 1), MAX_SEGMENTS)
+        if segments > 1:
+            threshold = int(float(opts.get(
+                "segment_threshold_mb", SEGMENT_THRESHOLD_MB)) * 1024 * 1024)
+            info = self._probe(sources[0], segments, threshold)
+            if info is not None and known_src == sources[0] and \
+                    _same_validators(info, known):
+                # HEAD hat die Revalidierung bereits erledigt
+                return DownloadResult(url=url, dest=dest, not_modified=True,
+                                      source=sources[0])
+            if info is not None and info["segmentable"]:
+                try:
+                    written, used = self._transfer_segmented(
+                        info, dest, throttle, progress)
+                    # Bereiche kommen ungeordnet an -> Digest am Ende
+                    return DownloadResult(
+                        url=url, dest=dest, bytes=written,
+                        resumed_from=info.get("resumed", 0), segments=used,
+                        sha256=utils.compute_sha256(dest),
+                        etag=info["etag"],
+                        last_modified=info["last_modified"],
+                        source=sources[0], final_url=info["final_url"])
+                except RangeNotSupported:
+                    # Fallback: einzelner Stream ab Byte 0
+                    discard_partial(dest)
+                except requests.RequestException:
+                    if len(sources) == 1:
+                        raise
+                    # Weiter mit dem nächsten Spiegel
+                    start = 1
+        # Fremde .part-Dateien nur mit Hash fortsetzen, sonst ab Byte 0
+        expected = expected_sha256(url, opts)
+        for i in range(start, len(sources)):
+            src = sources[i]
+            last = i == len(sources) - 1
+            floor = self._watchdog(src)
+            try:
+                written, resumed_from, meta = self._transfer(
+                    src, dest, known if src == known_src else None,
+                    throttle, floor=floor, foreign_ok=i > 0 and bool(expected),
+                    progress=progress)
+                if i > 0 and resumed_from and expected and \
+                        meta.get("sha256") != expected:
+                    # Teil vom anderen Spiegel passte nicht -> komplett neu
+                    os.remove(dest)
+                    written, resumed_from, meta = self._transfer(
+                        src, dest, None, throttle, floor=self._watchdog(src),
+                        progress=progress)
+                break
+            except requests.RequestException:
+                if last:
+                    raise
+        if meta.get("not_modified"):
+            return DownloadResult(url=url, dest=dest, not_modified=True,
+                                  source=src)
+        return DownloadResult(url=url, dest=dest, bytes=written,
+                              resumed_from=resumed_from,
+                              sha256=meta.get("sha256"),
+                              etag=meta.get("etag"),
+                              last_modified=meta.get("last_modified"),
+                              source=src, failovers=i,
+                              final_url=meta.get("final_url"))
+
+    def _probe(self, url: str, segments: int,
+               threshold: int) -> Optional[Dict[str, Any]]:
+        """HEAD probe for size, range support and validators.
+
+        info["segmentable"] tells whether a segmented transfer is possible
+        and worthwhile for this file.
+        """
+        try:
+            r = self.session.head(url, allow_redirects=True,
+                                  headers=http_client.IDENTITY,
+                                  timeout=http_client.TIMEOUT)
+            r.close()
+        except requests.RequestException:
+            return None
+        if r.status_code != 200:
+            return None
+        length = r.headers.get("Content-Length", "")
+        ranges = "bytes" in r.headers.get("Accept-Ranges", "").lower()
+        return {
+            "url": url,
+            "final_url": r.url,
+            "etag": r.headers.get("ETag"),
+            "last_modified": r.headers.get("Last-Modified"),
+            "size": int(length) if length.isdigit() else None,
+            "segments": segments,
+            "segmentable": ranges and length.isdigit()
+            and int(length) >= threshold,
+        }
+
+    def _transfer_segmented(self, info: Dict[str, Any], dest: str,
+                            throttle: Optional[Callable[[int], None]] = None,
+                            progress: Optional[progress_mod.ItemProgress] = None):
+        """Fetches `info['size']` bytes as parallel byte ranges.
+
+        Returns:
+            (bytes in the finished file, number of ranges).
+
+        Progress per range is kept in the sidecar, so an interrupted
+        segmented transfer continues with the missing parts only.
+        The caller's host slot covers one connection; every further
+        parallel range needs a free slot of the same host (taken without
+        waiting), so `per_host` also bounds segmented transfers.
+
+        Raises:
+            RangeNotSupported: If a range request is answered without 206.
+        """
+        part = dest + PART_SUFFIX
+        size = info["size"]
+        old = _load_sidecar(dest)
+        same = (old.get("mode") == "segmented" and old.get("url") == info["url"]
+                and old.get("size") == size
+                and old.get("etag") == info["etag"]
+                and old.get("last_modified") == info["last_modified"]
+                and os.path.exists(part) and os.path.getsize(part) == size)
+        if same:
+            ranges: List[List[int]] = old["ranges"]
+            info["resumed"] = sum(r[2] for r in ranges)
+        else:
+            step = -(-size // info["segments"])
+            ranges = [[start, min(start + step, size) - 1, 0]
+                      for start in range(0, size, step)]
+            # Zieldatei in voller Größe vorbelegen
+            with open(part, 'wb') as f:
+                f.truncate(size)
+        meta = dict(info, mode="segmented", ranges=ranges)
+        meta.pop("resumed", None)
+        _save_sidecar(dest, meta)
+        if progress is not None:
+            progress.start(size, sum(r[2] for r in ranges))
+        validator = _resume_validator(info)
+        lock = threading.Lock()
+
+        def _segment(rng: List[int]) -> None:
+            start, end, done = rng
+            if start + done > end:
+                return
+            headers = {**http_client.IDENTITY,
+                       "Range": f"bytes={start + done}-{end}"}
+            if validator:
+                headers["If-Range"] = validator
+            watchdog = self._watchdog(info["final_url"])
+            with self.session.get(info["final_url"], stream=True,
+                                  headers=headers,
+                                  timeout=self._timeout()) as r:
+                r.raise_for_status()
+                if r.status_code != 206:
+                    raise RangeNotSupported(
+                        f"HTTP {r.status_code} for range {headers['Range']}")
+                counters = {"since_save": 0}
+                with open(part, 'r+b') as f:
+                    f.seek(start + done)
+
+                    def _on_chunk(data: memoryview) -> None:
+                        if watchdog is not None:
+                            watchdog.add(len(data))
+                        counters["since_save"] += len(data)
+                        with lock:
+                            rng[2] += len(data)
+                            if counters["since_save"] >= SIDECAR_INTERVAL:
+                                f.flush()
+                                _save_sidecar(dest, meta)
+                                counters["since_save"] = 0
+
+                    copy_stream(r, f, limit=end + 1 - (start + done),
+                                on_chunk=_on_chunk,
+                                throttle=watchdog.wrap(throttle) if watchdog
+                                else throttle)
+
+        # Zusätzliche Verbindungen nur im Rahmen des Host-Limits
+        open_ranges = sum(1 for r in ranges if r[0] + r[2] <= r[1])
+        slot = self._host_slot(host_of(info["final_url"]))
+        extra = 0
+        while extra < open_ranges - 1 and slot.acquire(blocking=False):
+            extra += 1
+        try:
+            with ThreadPoolExecutor(max_workers=1 + extra,
+                                    thread_name_prefix="dl-seg") as pool:
+                for fut in [pool.submit(_segment, rng) for rng in ranges]:
+                    fut.result()
+        finally:
+            for _ in range(extra):
+                slot.release()
+            with lock:
+                _save_sidecar(dest, meta)
+
+        # Ergebnis prüfen: alle Bereiche vollständig, Dateigröße stimmt
+        missing = [r for r in ranges if r[0] + r[2] <= r[1]]
+        if missing or os.path.getsize(part) != size:
+            raise requests.exceptions.ChunkedEncodingError(
+                f"Segmented download incomplete ({len(missing)} ranges open)")
+        os.replace(part, dest)
+        discard_partial(dest)
+        return size, len(ranges)
+
+    def _transfer(self, url: str, dest: str,
+                  known: Optional[Dict[str, Any]] = None,
+                  throttle: Optional[Callable[[int], None]] = None,
+                  floor: Optional[_StallWatchdog] = None,
+                  foreign_ok: bool = False,
+                  progress: Optional[progress_mod.ItemProgress] = None):
+        """Streams into `dest`.part, resuming via Range when possible.
+
+        With `known` validators and nothing to resume, the request is sent
+        conditionally; a 304 yields meta["not_modified"].
+        `foreign_ok` allows continuing a .part that another mirror started;
+        validators differ between mirrors, so only the total size is
+        checked. Only pass it for entries with a "sha256": _download()
+        checks the result and restarts from byte 0 on a mismatch.
+
+        Returns:
+            (bytes written in total, offset the transfer resumed from,
+            response metadata incl. validators).
+        """
+        part = dest + PART_SUFFIX
+        meta = _load_sidecar(dest)
+        offset = 0
+        headers = dict(http_client.IDENTITY)
+        foreign_size = None
+        same_source = meta.get("url") == url
+        if os.path.exists(part) and (same_source or (
+                foreign_ok and meta.get("size") and "offset" in meta)):
+            offset = min(int(meta.get("offset") or 0), os.path.getsize(part))
+            validator = _resume_validator(meta) if same_source else None
+            if offset > 0 and validator:
+                headers["Range"] = f"bytes={offset}-"
+                headers["If-Range"] = validator
+            elif offset > 0 and not same_source:
+                headers["Range"] = f"bytes={offset}-"
+                foreign_size = meta["size"]
+            else:
+                offset = 0
+        if not offset and known:
+            if known.get("etag"):
+                headers["If-None-Match"] = known["etag"]
+            if known.get("last_modified"):
+                headers["If-Modified-Since"] = known["last_modified"]
+
+        with self.session.get(url, stream=True, headers=headers,
+                              timeout=self._timeout()) as r:
+            if r.status_code == 304 and known:
+                return 0, 0, {"not_modified": True}
+            if offset and r.status_code == 416:
+                # Range passt nicht (mehr) zur Datei -> komplett neu laden
+                r.close()
+                discard_partial(dest)
+                return self._transfer(url, dest, known, throttle, floor,
+                                      progress=progress)
+            r.raise_for_status()
+            if offset and r.status_code == 206 and (not r.headers.get(
+                    "Content-Range", "").startswith(f"bytes {offset}-") or (
+                    foreign_size is not None
+                    and _total_from_response(r, offset) != foreign_size)):
+                # Unerwarteter Bereich/andere Datei -> Teildatei verwerfen
+                r.close()
+                discard_partial(dest)
+                return self._transfer(url, dest, known, throttle, floor,
+                                      progress=progress)
+            if offset and r.status_code != 206:
+                # Range abgelehnt oder Validator geändert -> ab Byte 0
+                offset = 0
+            meta = {
+                "url": url,
+                "final_url": r.url,
+                "etag": r.headers.get("ETag"),
+                "last_modified": r.headers.get("Last-Modified"),
+                "size": _total_from_response(r, offset),
+                "offset": offset,
+            }
+            _save_sidecar(dest, meta)
+            if progress is not None:
+                progress.start(meta["size"], offset)
+            counters = {"written": offset, "since_save": 0}
+            mode = 'r+b' if offset else 'wb'
+            hasher = hashlib.sha256()
+            try:
+                with open(part, mode) as f:
+                    if offset:
+                        # Vorhandenen Teil einmalig nachhashen
+                        remaining = offset
+                        while remaining:
+                            block = f.read(min(remaining, 1024 * 1024))
+                            if not block:
+                                break
+                            hasher.update(block)
+                            remaining -= len(block)
+                    f.seek(offset)
+                    # Bei bekannter Größe vorbelegen; maßgeblich für den
+                    # Fortsetzungspunkt ist dann nur der Offset im Sidecar
+                    f.truncate(meta["size"] or offset)
+
+                    def _on_chunk(data: memoryview) -> None:
+                        hasher.update(data)
+                        if floor is not None:
+                            floor.add(len(data))
+                        counters["written"] += len(data)
+                        counters["since_save"] += len(data)
+                        if counters["since_save"] >= SIDECAR_INTERVAL:
+                            f.flush()
+                            meta["offset"] = counters["written"]
+                            _save_sidecar(dest, meta)
+                            counters["since_save"] = 0
+
+                    copy_stream(r, f, on_chunk=_on_chunk,
+                                throttle=floor.wrap(throttle) if floor
+                                else throttle)
+                    if meta["size"] is None:
+                        f.truncate()
+            finally:
+                written = counters["written"]
+                # Stand auch bei Abbruch sichern, damit der nächste Versuch
+                # an dieser Stelle weitermacht
+                meta["offset"] = written
+                _save_sidecar(dest, meta)
+
+        if meta["size"] is not None and written != meta["size"]:
+            raise requests.exceptions.ChunkedEncodingError(
+                f"Incomplete download: {written} of {meta['size']} bytes")
+        os.replace(part, dest)
+        discard_partial(dest)
+        meta["sha256"] = hasher.hexdigest()
+        return written, offset, meta
+
+    def restore(self, sha256: str, dest: str) -> bool:
+        """Materializes a cached object by digest; False if not cached."""
+        return self.cache is not None and self.cache.materialize(sha256, dest)
+
+    def forget(self, url: str) -> None:
+        """Removes `url` from the artifact cache so the next fetch downloads."""
+        if self.cache is not None:
+            self.cache.forget(url)
+
+
+def stall_settings(network: Optional[Dict[str, Any]] = None
+                   ) -> Dict[str, float]:
+    """Stall floor/window from defaults, links.json "network" and env.
+
+    OPTIMIZER_STALL_MIN_KBPS / OPTIMIZER_STALL_SECONDS win over links.json;
+    0 for either disables the watchdog.
+    """
+    settings = {"stall_min_kbps": float(STALL_MIN_KBPS),
+                "stall_seconds": float(STALL_SECONDS)}
+    for key in settings:
+        env = os.environ.get(f"OPTIMIZER_{key.upper()}")
+        for source in ((network or {}).get(key), env):
+            if source in (None, ""):
+                continue
+            try:
+                settings[key] = max(0.0, float(source))
+            except (TypeError, ValueError):
+                pass
+    return settings
+
+
+def peer_settings(network: Optional[Dict[str, Any]] = None) -> List[str]:
+    """LAN peer base URLs from links.json "network" -> "peers" or env.
+
+    OPTIMIZER_PEERS (comma-separated, e.g. "http://10.0.0.5:8765") wins
+    over links.json; an empty value disables peers.
+    """
+    env = os.environ.get("OPTIMIZER_PEERS")
+    if env is not None:
+        peers = env.split(",")
+    else:
+        peers = (network or {}).get("peers") or []
+        if isinstance(peers, str):
+            peers = [peers]
+    return [p.strip().rstrip("/") for p in peers if p and p.strip()]
+
+
+def configure_network(network: Optional[Dict[str, Any]] = None,
+                      log: Optional[Any] = None) -> Dict[str, Any]:
+    """Applies bandwidth limits, stall settings and peers to the manager.
+
+    `log` receives download_stall events from then on.
+
+    Returns:
+        The effective settings (KiB/s, seconds), for logging.
+    """
+    manager = get_manager()
+    shaper = ratelimit.Shaper(**ratelimit.settings_from(network))
+    stall = stall_settings(network)
+    manager.shaper = shaper
+    manager.stall_min_kbps = stall["stall_min_kbps"]
+    manager.stall_seconds = stall["stall_seconds"]
+    manager.peers = peer_settings(network)
+    if log is not None:
+        manager.log = log
+    return {**shaper.describe(), **stall, "peers": manager.peers}
+
+
+_manager: Optional[DownloadManager] = None
+_manager_lock = threading.Lock()
+
+
+def get_manager() -> DownloadManager:
+    """Returns the process-wide download manager (created lazily)."""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = DownloadManager(cache=artifact_cache.default_cache())
+        return _manager
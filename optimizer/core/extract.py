@@ -0,0 +1,171 @@
+import fnmatch
+import os
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Union
+import zipfile
+
+from . import cancel as cancel_mod
+from . import utils
+
+# Ab dieser entpackten Gesamtgröße lohnt sich der Thread-Pool
+PARALLEL_THRESHOLD = 8 * 1024 * 1024
+MAX_WORKERS = min(8, os.cpu_count() or 2)
+CRC_CHUNK = 1024 * 1024
+
+
+@dataclass
+class ExtractResult:
+    """Summary of one extract_zip call."""
+    dest: str
+    extracted: int = 0
+    skipped: int = 0
+    bytes: int = 0
+    seconds: float = 0.0
+    workers: int = 1
+    # Nur bei remote_zip: übertragene Bytes und Anzahl Range-Anfragen
+    fetched: int = 0
+    requests: int = 0
+    # Ausgewählte Dateien: relativer Pfad ('/') -> [Größe, CRC-32]
+    manifest: Dict[str, List[int]] = field(default_factory=dict)
+
+
+def file_crc32(path: str) -> int:
+    """CRC-32 of a file as stored in zip headers."""
+    crc = 0
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CRC_CHUNK), b''):
+            crc = zlib.crc32(chunk, crc)
+    return crc & 0xFFFFFFFF
+
+
+def _is_current(info: zipfile.ZipInfo, target: str) -> bool:
+    """True if `target` already holds the member (same size and CRC)."""
+    try:
+        if os.path.getsize(target) != info.file_size:
+            return False
+        return file_crc32(target) == info.CRC
+    except OSError:
+        return False
+
+
+def _target_path(dest_dir: str, info: zipfile.ZipInfo) -> str:
+    # Gleiche Bereinigung wie ZipFile._extract_member (kein Zip-Slip)
+    arcname = info.filename.replace('/', os.path.sep)
+    if os.path.altsep:
+        arcname = arcname.replace(os.path.altsep, os.path.sep)
+    arcname = os.path.splitdrive(arcname)[1]
+    parts = (x for x in arcname.split(os.path.sep)
+             if x not in ('', os.path.curdir, os.path.pardir))
+    return os.path.join(dest_dir, *parts)
+
+
+def select_members(infos: Iterable[zipfile.ZipInfo],
+                   patterns: Optional[List[str]] = None
+                   ) -> List[zipfile.ZipInfo]:
+    """Filters archive members by glob patterns (case-insensitive).
+
+    A pattern matches the full member path or its basename, so "*.exe"
+    and "bin/*.dll" both work. Without patterns every file is returned.
+    """
+    files = [i for i in infos if not i.is_dir()]
+    if not patterns:
+        return files
+    pats = [p.lower() for p in patterns]
+    chosen = []
+    for info in files:
+        name = info.filename.lower()
+        base = name.rsplit('/', 1)[-1]
+        if any(fnmatch.fnmatch(name, p) or fnmatch.fnmatch(base, p)
+               for p in pats):
+            chosen.append(info)
+    return chosen
+
+
+def extract_zip(zip_path: Union[str, Any], dest_dir: str,
+                members: Optional[List[str]] = None,
+                workers: Optional[int] = None,
+                before_extract: Optional[
+                    Callable[[List[zipfile.ZipInfo]], None]] = None,
+                cancel: Optional[cancel_mod.CancelToken] = None
+                ) -> ExtractResult:
+    """Extracts `zip_path` into `dest_dir`, skipping unchanged files.
+
+    Members whose size and CRC-32 already match the file on disk are left
+    alone. `members` restricts extraction to matching glob patterns (see
+    select_members). Large archives are decompressed on a thread pool with
+    one ZipFile handle per thread. `zip_path` may also be a seekable file
+    object (e.g. remote_zip.RangeFile); it is then read on one thread.
+    `before_extract` sees the members that will actually be written.
+    `cancel` is checked before every member.
+
+    Raises:
+        zipfile.BadZipFile: If the archive is corrupt.
+        ValueError: If `members` is given but matches nothing.
+        cancel.Cancelled: If `cancel` fired; finished members stay on disk.
+    """
+    t0 = time.time()
+    result = ExtractResult(dest=dest_dir)
+    utils.ensure_dir(dest_dir)
+    with zipfile.ZipFile(zip_path, 'r') as z:
+        selected = select_members(z.infolist(), members)
+        if members and not selected:
+            name = getattr(zip_path, 'name', zip_path)
+            raise ValueError(
+                f"No members of {os.path.basename(name)} match {members}")
+        todo = []
+        for info in selected:
+            target = _target_path(dest_dir, info)
+            if not info.is_dir():
+                rel = os.path.relpath(target, dest_dir).replace(os.sep, '/')
+                result.manifest[rel] = [info.file_size, info.CRC]
+            if _is_current(info, target):
+                result.skipped += 1
+            else:
+                todo.append(info)
+        total = sum(i.file_size for i in todo)
+        if not isinstance(zip_path, str):
+            # Dateiobjekte lassen sich nicht pro Thread neu öffnen
+            workers = 1
+        if before_extract is not None and todo:
+            before_extract(todo)
+        if workers is None:
+            workers = MAX_WORKERS if total >= PARALLEL_THRESHOLD else 1
+        workers = max(1, min(workers, len(todo) or 1))
+        result.workers = workers
+        if workers == 1:
+            for info in todo:
+                cancel_mod.check(cancel)
+                z.extract(info, dest_dir)
+        else:
+            local = threading.local()
+            handles = []
+            handles_lock = threading.Lock()
+
+            def _one(info: zipfile.ZipInfo) -> None:
+                cancel_mod.check(cancel)
+                zf = getattr(local, 'zf', None)
+                if zf is None:
+                    # ZipFile-Objekte sind nicht threadsicher -> je Thread eins
+                    zf = local.zf = zipfile.ZipFile(zip_path, 'r')
+                    with handles_lock:
+                        handles.append(zf)
+                zf.extract(info, dest_dir)
+
+            try:
+                with ThreadPoolExecutor(max_workers=workers,
+                                        thread_name_prefix="unzip") as pool:
+                    # Große Member zuerst, damit kein Nachzügler übrig bleibt
+                    todo.sort(key=lambda i: i.file_size, reverse=True)
+                    for fut in [pool.submit(_one, i) for i in todo]:
+                        fut.result()
+            finally:
+                for zf in handles:
+                    zf.close()
+    result.extracted = len(todo)
+    result.bytes = total
+    result.seconds = round(time.time() - t0, 3)
+    return result
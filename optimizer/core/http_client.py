@@ -0,0 +1,45 @@
+import threading
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+USER_AGENT = f"OptiBundler (python-requests/{requests.__version__})"
+# (Verbindungsaufbau, Lesen) in Sekunden
+CONNECT_TIMEOUT = 10
+READ_TIMEOUT = 60
+TIMEOUT = (CONNECT_TIMEOUT, READ_TIMEOUT)
+# Für Dateiübertragungen: keine Transportkompression, sonst passen
+# Content-Length, Range-Offsets und gezählte Bytes nicht zusammen
+IDENTITY = {"Accept-Encoding": "identity"}
+# Anzahl Hosts im Pool und Verbindungen je Host (Segmente x Transfers)
+POOL_HOSTS = 16
+POOL_PER_HOST = 16
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+def _build_session() -> requests.Session:
+    session = requests.Session()
+    # Wiederholungen übernimmt der Aufrufer, nicht urllib3
+    adapter = HTTPAdapter(pool_connections=POOL_HOSTS,
+                          pool_maxsize=POOL_PER_HOST, max_retries=0)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers["User-Agent"] = USER_AGENT
+    return session
+
+
+def get_session() -> requests.Session:
+    """Returns the process-wide keep-alive session used by all network code.
+
+    Reusing it avoids a new TCP/TLS handshake for every request against the
+    same host. Pass `timeout=TIMEOUT` (or a tighter tuple) on each call;
+    requests has no session-wide timeout.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = _build_session()
+        return _session
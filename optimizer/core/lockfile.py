@@ -0,0 +1,163 @@
+import copy
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from . import extract
+from . import utils
+
+# links.lock liegt neben links.json
+LOCK_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                         "links.lock")
+LOCK_VERSION = 1
+
+
+class LockFile:
+    """links.lock: what every artifact resolved to on the last good run.
+
+    Per artifact name it records the URL, the final redirect target, size,
+    SHA-256, ETag/Last-Modified, the local path and, for archives, the
+    manifest of the extracted tree. verify() checks the local copy against
+    it without network access: files whose size and mtime are unchanged
+    are trusted as-is, others are re-hashed.
+    """
+
+    def __init__(self, path: str = LOCK_FILE) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._data = self._load()
+
+    def _load(self) -> Dict[str, Any]:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if isinstance(data, dict) and \
+                    data.get("version") == LOCK_VERSION:
+                data.setdefault("artifacts", {})
+                return data
+        except Exception:
+            pass
+        return {"version": LOCK_VERSION, "artifacts": {}}
+
+    def _save(self) -> None:
+        tmp = self.path + ".tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self._data, f, indent=2, sort_keys=True)
+        os.replace(tmp, self.path)
+
+    def entry(self, name: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._data["artifacts"].get(name)
+            return copy.deepcopy(entry) if entry else None
+
+    def sha256_for(self, url: str) -> Optional[str]:
+        """SHA-256 of the archive recorded for `url`, None if unknown."""
+        with self._lock:
+            for entry in self._data["artifacts"].values():
+                if entry.get("url") == url and entry.get("sha256"):
+                    return entry["sha256"]
+        return None
+
+    def record(self, name: str, result: Any,
+               extracted: Optional[extract.ExtractResult] = None) -> None:
+        """Stores a finished artifact (downloads.DownloadResult).
+
+        `extracted` adds the manifest of the unpacked tree; for remote
+        extraction (no local archive) only the tree is recorded.
+        """
+        archive = os.path.exists(result.dest) and os.path.isfile(result.dest)
+        with self._lock:
+            old = self._data["artifacts"].get(name) or {}
+            if old.get("url") != result.url:
+                old = {}
+            entry: Dict[str, Any] = {
+                "url": result.url,
+                # Cache-Treffer kennen kein Redirect-Ziel -> altes behalten
+                "final_url": result.final_url or old.get("final_url"),
+                "etag": result.etag or old.get("etag"),
+                "last_modified": result.last_modified or old.get(
+                    "last_modified"),
+                "locked_at": time.time(),
+            }
+            if archive:
+                stamp = utils.file_stamp(result.dest)
+                entry.update({
+                    "path": os.path.abspath(result.dest),
+                    "size": stamp[0] if stamp else None,
+                    "mtime_ns": stamp[1] if stamp else None,
+                    "sha256": result.sha256 or utils.compute_sha256(
+                        result.dest),
+                })
+            if extracted is not None:
+                entry["extract_dir"] = os.path.abspath(extracted.dest)
+                entry["manifest"] = {
+                    rel: size_crc + [(utils.file_stamp(os.path.join(
+                        extracted.dest, rel)) or [0, 0])[1]]
+                    for rel, size_crc in extracted.manifest.items()
+                }
+            self._data["artifacts"][name] = entry
+            self._save()
+
+    def drop(self, name: str) -> None:
+        with self._lock:
+            if self._data["artifacts"].pop(name, None) is not None:
+                self._save()
+
+    def verify(self, name: str, url: str) -> Optional[str]:
+        """Checks the local copy of `name` against the lock (no network).
+
+        Returns:
+            "fast" if size+mtime of everything matched, "hashed" if some
+            files had to be re-hashed (their new mtime is stored), or None
+            if the entry is missing, for another URL, or the files differ.
+        """
+        entry = self.entry(name)
+        if not entry or entry.get("url") != url:
+            return None
+        hashed = False
+        path = entry.get("path")
+        if path:
+            stamp = utils.file_stamp(path)
+            if stamp is None or stamp[0] != entry.get("size"):
+                return None
+            if stamp[1] != entry.get("mtime_ns"):
+                if utils.compute_sha256(path) != entry.get("sha256"):
+                    return None
+                entry["mtime_ns"] = stamp[1]
+                hashed = True
+        manifest = entry.get("manifest")
+        if manifest is not None:
+            root = entry.get("extract_dir") or ""
+            for rel, (size, crc, mtime_ns) in manifest.items():
+                target = os.path.join(root, *rel.split('/'))
+                stamp = utils.file_stamp(target)
+                if stamp is None or stamp[0] != size:
+                    return None
+                if stamp[1] != mtime_ns:
+                    if extract.file_crc32(target) != crc:
+                        return None
+                    manifest[rel] = [size, crc, stamp[1]]
+                    hashed = True
+        elif not path:
+            return None
+        if hashed:
+            with self._lock:
+                if self._data["artifacts"].get(name, {}).get("url") == url:
+                    self._data["artifacts"][name] = entry
+                    self._save()
+        return "hashed" if hashed else "fast"
+
+
+_lockfile: Optional[LockFile] = None
+_lockfile_lock = threading.Lock()
+
+
+def get_lock() -> LockFile:
+    """Returns the process-wide links.lock (loaded lazily)."""
+    global _lockfile
+    with _lockfile_lock:
+        if _lockfile is None:
+            _lockfile = LockFile()
+        return _lockfile
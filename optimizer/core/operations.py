@@ -6,16 +6,25 @@ import webbrowser
 import shutil
 import zipfile
 import json
-import requests
 import threading
 import sys
 import ttkbootstrap as tb
 from ttkbootstrap.dialogs import Messagebox
 from ttkbootstrap import ttk
-from typing import Any, Optional
+from typing import Any, Callable, Optional
 
 from .logging_setup import log_event
 from . import utils
+from . import downloads
+from . import pipeline
+from . import extract
+from . import ratelimit
+from . import progress
+from . import remote_zip
+from . import retry
+from . import cancel
+from . import lockfile
+from . import catalog
 
 def _set_ui_disabled(app: Any, disabled: bool) -> None:
     """En-/Disable Hauptfenster-Interaktion global."""
@@ -147,10 +156,11 @@ def ensure_chocolatey(app: Any) -> bool:
             "'https://community.chocolatey.org/install.ps1'))"
         )
         log_event(app.log, "choco_install_start")
-        subprocess.check_call(
-            ["powershell.exe", "-NoProfile", "-ExecutionPolicy",
-                "Bypass", "-Command", ps]
-        )
+        retry.call(
+            lambda: subprocess.check_call(
+                ["powershell.exe", "-NoProfile", "-ExecutionPolicy",
+                    "Bypass", "-Command", ps]),
+            "choco_install", key="community.chocolatey.org", log=app.log)
         deadline = time.time() + 90
         while time.time() < deadline:
             if os.path.exists(get_choco_exe()):
@@ -169,8 +179,13 @@ def ensure_chocolatey(app: Any) -> bool:
             "Chocolatey", f"Chocolatey-Installation fehlgeschlagen:\n{e}")
         return False
 
-def choco_upgrade(app: Any, pkg: str, prerelease: bool = False) -> bool:
-    """Aktualisiert/Installiert ein Paket via Chocolatey. True bei Erfolg."""
+def choco_upgrade(app: Any, pkg: str, prerelease: bool = False,
+                  phase_cancel: Optional[cancel.CancelToken] = None) -> bool:
+    """Aktualisiert/Installiert ein Paket via Chocolatey. True bei Erfolg.
+
+    Bei Abbruch über `phase_cancel` wird choco beendet und
+    cancel.Cancelled weitergereicht.
+    """
     app.log.phase = "choco"
     choco_exe = get_choco_exe()
     args = [choco_exe, "upgrade", pkg, "-y", "--limit-output"]
@@ -180,10 +195,15 @@ def choco_upgrade(app: Any, pkg: str, prerelease: bool = False) -> bool:
     try:
         log_event(app.log, "choco_upgrade_start",
                   pkg=pkg, prerelease=prerelease)
-        subprocess.check_call(args)
+        # Choco meldet jeden Fehler als rc 1 -> nur ein zweiter Versuch
+        retry.call(lambda: cancel.run(args, phase_cancel), "choco_upgrade",
+                   log=app.log, attempts=2, cancel=phase_cancel, pkg=pkg)
         dt = round(time.time() - t0, 2)
         log_event(app.log, "choco_upgrade_ok", pkg=pkg, seconds=dt)
         return True
+    except cancel.Cancelled:
+        log_event(app.log, "choco_upgrade_cancelled", pkg=pkg)
+        raise
     except subprocess.CalledProcessError as e:
         log_event(app.log, "choco_upgrade_fail", pkg=pkg, rc=e.returncode)
         return False
@@ -202,187 +222,478 @@ def get_desktop_path() -> str:
     return os.getcwd()
 
 
-def download_from_guide(app: Any, tool_name: str) -> None:
-    """Downloads a tool from the Guide tab to the desktop."""
+def _download_options(app: Any) -> dict:
+    """Per-artifact download options from links.json (see downloads.parse_entry)."""
+    if not isinstance(getattr(app, 'download_options', None), dict):
+        app.download_options = {}
+    return app.download_options
+
+
+def _fetch_options(app: Any, name: str) -> dict:
+    """download_options[name] plus the expected "sha256" from download_hashes.
+
+    The manager takes LAN peer copies (and partial files of other
+    mirrors) only for URLs with a known hash.
+    """
+    opts = dict(_download_options(app).get(name) or {})
+    expected = (getattr(app, 'download_hashes', {}) or {}).get(name)
+    if expected:
+        opts['sha256'] = expected
+    return opts
+
+
+# Zustände eines Eintrags in app.guide_queue
+GUIDE_ACTIVE = ('queued', 'downloading', 'verifying', 'extracting')
+_guide_lock = threading.Lock()
+
+
+def _guide_status(app: Any, tool_name: str, status: str,
+                  percent: Optional[int] = None,
+                  text: Optional[str] = None) -> None:
+    """Aktualisiert app.guide_queue[tool] und die Zeile im Guide-Tab."""
+    with _guide_lock:
+        old = app.guide_queue.get(tool_name) or {}
+        app.guide_queue[tool_name] = {
+            'status': status,
+            'percent': old.get('percent', 0) if percent is None else percent,
+            'text': text if text is not None else old.get('text', ''),
+        }
+    try:
+        app.root.after(0, lambda: app.update_guide_queue(tool_name))
+    except Exception:
+        pass
+
+
+def _load_guide_downloads(app: Any) -> None:
+    """Übernimmt die Guide-Tools aus dem aktuellen Katalog.
+
+    Läuft vor jedem Guide-Download, damit eine Hintergrund-Aktualisierung
+    des Katalogs (catalog.refresh) sofort wirkt.
+    """
+    cat = catalog.get_catalog()
+    hashes = cat.links.get("hashes", {}) or {}
+    if not isinstance(getattr(app, 'guide_downloads', None), dict):
+        app.guide_downloads = {}
+    if not isinstance(getattr(app, 'download_hashes', None), dict):
+        app.download_hashes = {}
+    for key, (url, opts) in cat.tools.items():
+        app.guide_downloads[key] = url
+        _download_options(app)[key] = dict(opts)
+        expected = hashes.get(key) or opts.get("sha256")
+        if expected:
+            app.download_hashes[key] = expected
+
+
+def download_from_guide(app: Any, tool_name: str) -> bool:
+    """Queues a Guide tool download to the desktop (non-blocking).
+
+    Several tools download concurrently within the download manager's
+    limits; the window stays usable. Progress and the result of every item
+    live in app.guide_queue and are shown in the Guide tab via
+    app.update_guide_queue(). Returns False if the tool is already queued.
+    """
     app.log.phase = "guide_download"
+    if not isinstance(getattr(app, 'guide_queue', None), dict):
+        app.guide_queue = {}
+    with _guide_lock:
+        state = app.guide_queue.get(tool_name) or {}
+        if state.get('status') in GUIDE_ACTIVE:
+            return False
     log_event(app.log, "guide_download_start", tool=tool_name)
+    _guide_status(app, tool_name, 'queued', 0, "")
+    phase_cancel = app.phase_cancel
 
-    # Bestätigung muss im Hauptthread erfolgen - wird von GUI gehandhabt
-    # if not Messagebox.yesno(
-    #     f"Do you really want to download {tool_name}?", title="Confirm Download"
-    # ):
-    #     log_event(app.log, "guide_download_cancelled", tool=tool_name)
-    #     return
-
-    _set_ui_disabled(app, True)
+    def _on_progress(percent: int, text: str) -> None:
+        state = app.guide_queue.get(tool_name) or {}
+        status = state.get('status') if state.get('status') in (
+            'verifying', 'extracting') else 'downloading'
+        _guide_status(app, tool_name, status, percent, text)
 
     def _worker():
-        result_message = None
-        result_title = "Success"
+        model = progress.ProgressModel([tool_name], _on_progress)
+        tracker = model.item(tool_name)
         try:
-            if not hasattr(app, 'guide_downloads') or not app.guide_downloads:
-                import json
-                links_path = os.path.join(
-                    getattr(app, 'BASE_DIR', os.getcwd()),
-                    "optimizer", "core", "links.json"
-                )
-                with open(links_path) as f:
-                    links = json.load(f)
-                app.guide_downloads = links.get("guide_downloads", {})
-
+            _load_guide_downloads(app)
             url = app.guide_downloads.get(tool_name)
             if not url:
                 raise ValueError(
                     f"URL for {tool_name} not found in guide_downloads")
 
+            if _locked(app, tool_name, url):
+                entry = lockfile.get_lock().entry(tool_name) or {}
+                tracker.finish()
+                _guide_status(app, tool_name, 'done', 100,
+                              entry.get('extract_dir') or entry.get('path'))
+                return
+
             desktop = get_desktop_path()
             filename = utils.filename_from_url(url, f"{tool_name}.zip")
             target_path = os.path.join(desktop, filename)
 
-            r = requests.get(url, stream=True, timeout=120)
-            r.raise_for_status()
-            with open(target_path, 'wb') as f:
-                for chunk in r.iter_content(8192):
-                    if chunk:
-                        f.write(chunk)
+            result = retry.call(
+                lambda: downloads.get_manager().fetch(
+                    url, target_path, _fetch_options(app, tool_name),
+                    progress=tracker, cancel=phase_cancel),
+                "guide_download", key=downloads.host_of(url), log=app.log,
+                cancel=phase_cancel, tool=tool_name)
+            _guide_status(app, tool_name, 'verifying')
+            tracker.enter('verify')
+            _verify_download(app, tool_name, result)
 
             log_event(app.log, "guide_download_ok",
-                      tool=tool_name, dest=target_path)
-
+                      tool=tool_name, dest=target_path,
+                      bytes=result.bytes, sha256=result.sha256,
+                      resumed_from=result.resumed_from,
+                      segments=result.segments, from_cache=result.from_cache,
+                      not_modified=result.not_modified,
+                      source=result.source, failovers=result.failovers,
+                      joined=result.joined)
+
+            dest = target_path
+            ex = None
             if filename.lower().endswith('.zip'):
                 extract_dir = os.path.join(
                     desktop, os.path.splitext(filename)[0])
-                os.makedirs(extract_dir, exist_ok=True)
-                with zipfile.ZipFile(target_path, 'r') as z:
-                    z.extractall(extract_dir)
+                _guide_status(app, tool_name, 'extracting')
+                tracker.enter('extract')
+                ex = extract.extract_zip(
+                    target_path, extract_dir,
+                    _download_options(app).get(tool_name, {}).get(
+                        'extract_members'), cancel=phase_cancel)
                 log_event(app.log, "guide_unzip_ok",
-                          tool=tool_name, dest=extract_dir)
-                result_message = (
-                    f"{tool_name} was downloaded and extracted to {extract_dir}."
-                )
-            else:
-                result_message = (
-                    f"{tool_name} was downloaded to {target_path}.")
-
+                          tool=tool_name, dest=extract_dir,
+                          extracted=ex.extracted, skipped=ex.skipped,
+                          bytes=ex.bytes, workers=ex.workers,
+                          seconds=ex.seconds)
+                dest = extract_dir
+            _lock_record(app, tool_name, result, ex)
+            tracker.finish()
+            _guide_status(app, tool_name, 'done', 100, dest)
+        except cancel.Cancelled:
+            # Tab verlassen: Teildatei bleibt für den nächsten Versuch liegen
+            log_event(app.log, "guide_download_cancelled", tool=tool_name)
+            _guide_status(app, tool_name, 'cancelled', text="Guide verlassen")
         except Exception as e:
             log_event(app.log, "guide_download_fail",
                       tool=tool_name, err=str(e))
-            result_title = "Error"
-            result_message = f"Download of {tool_name} failed:\n{e}"
-        finally:
-            def _show_result():
-                try:
-                    if result_title == "Error":
-                        Messagebox.showerror(result_title, result_message)
-                    else:
-                        Messagebox.showinfo(result_title, result_message)
-                finally:
-                    _set_ui_disabled(app, False)
-            app.root.after(0, _show_result)
+            _guide_status(app, tool_name, 'failed', text=str(e))
 
     threading.Thread(
         target=_worker, daemon=True, name=f"{tool_name}-guide-dl").start()
+    return True
+
+def _download_target(app: Any, name: str):
+    """Liefert (filename, Zielpfad) für ein Artefakt aus download_urls."""
+    if name == 'talon':
+        filename = 'TalonLite.zip' if app.is_win10 else 'talon.zip'
+        fp = os.path.join(app.download_dir, filename)
+    elif name == 'exm_tweaks':
+        filename = 'exm_tweaks.zip'
+        fp = os.path.join(app.download_dir, filename)
+    elif name == 'boosterx':
+        filename = 'BoosterX.exe'
+        fp = os.path.join(app.download_dir, 'boosterx', filename)
+    else:
+        filename = 'unknown.bin'
+        fp = os.path.join(app.download_dir, filename)
+    return filename, fp
+
+
+def _verify_download(app: Any, name: str,
+                     result: downloads.DownloadResult) -> None:
+    """Checks the streamed SHA-256 against `download_hashes[name]`, if set.
+
+    Raises:
+        ValueError: On mismatch; the cache entry for the URL is dropped.
+    """
+    expected = (getattr(app, 'download_hashes', {}) or {}).get(name)
+    if not expected:
+        return
+    hexval = None
+    try:
+        algo, hexval = (expected.split(":", 1) + [
+            None])[:2] if ":" in expected else ("sha256", expected)
+        hexval = (hexval or "").strip().lower()
+        if algo.lower() != "sha256":
+            raise ValueError("Only sha256 is supported")
+        actual = result.sha256 or utils.compute_sha256(result.dest)
+        if actual.lower() != hexval:
+            raise ValueError(
+                f"SHA256-Mismatch: expected {hexval}, got {actual}")
+        log_event(app.log, "download_hash_ok", name=name, dest=result.dest,
+                  sha256_expected=hexval, sha256_actual=actual)
+    except Exception as he:
+        log_event(app.log, "download_hash_fail", name=name, dest=result.dest,
+                  sha256_expected=hexval, err=str(he))
+        # Fehlerhafte Kopie nicht erneut aus dem Cache liefern
+        downloads.get_manager().forget(result.url)
+        raise
+
+
+def _file_trusted(app: Any, name: str, url: Optional[str],
+                  path: str) -> bool:
+    """True if `path` matches the known SHA-256 of `name`.
+
+    Known means download_hashes or the links.lock entry for `url` (see
+    downloads.expected_sha256); without one the file is not trusted.
+    """
+    expected = downloads.expected_sha256(url or "", _fetch_options(app, name))
+    try:
+        return bool(expected) and utils.compute_sha256(path) == expected
+    except OSError:
+        return False
+
+
+def _locked(app: Any, name: str, url: str) -> bool:
+    """True if the local copy of `name` still matches links.lock.
+
+    With a hash in download_hashes the lock entry only counts if it was
+    recorded for that hash; otherwise it is dropped and `name` reloaded.
+    """
+    configured = (getattr(app, 'download_hashes', {}) or {}).get(name)
+    try:
+        if configured:
+            expected = downloads.expected_sha256(url, {"sha256": configured})
+            entry = lockfile.get_lock().entry(name)
+            if entry and entry.get("sha256") != expected:
+                log_event(app.log, "lock_hash_changed", name=name,
+                          expected=expected, locked=entry.get("sha256"))
+                lockfile.get_lock().drop(name)
+                return False
+        how = lockfile.get_lock().verify(name, url)
+    except Exception as e:
+        log_event(app.log, "lock_verify_error", name=name, err=str(e))
+        return False
+    if how:
+        log_event(app.log, "download_locked", name=name, check=how)
+    return how is not None
+
+
+def _lock_record(app: Any, name: str, result: downloads.DownloadResult,
+                 extracted: Optional[extract.ExtractResult] = None) -> None:
+    """Trägt ein fertiges Artefakt in links.lock ein (Fehler nur loggen)."""
+    try:
+        lockfile.get_lock().record(name, result, extracted)
+    except Exception as e:
+        log_event(app.log, "lock_write_error", name=name, err=str(e))
+
+
+def _try_remote_extract(app: Any, name: str, url: str, out: str,
+                        priority: str,
+                        phase_cancel: Optional[cancel.CancelToken] = None
+                        ) -> Optional[extract.ExtractResult]:
+    """Entpackt nur `extract_members` per Range-Anfragen, ohne ganzes ZIP.
+
+    Aktiv über "remote_extract": true am links.json-Eintrag. Nicht bei
+    gesetztem Hash, da sich ein Teil-Download nicht gegen den SHA-256 des
+    Archivs prüfen lässt. Liefert None, wenn voll geladen werden muss.
+    """
+    opts = _download_options(app).get(name) or {}
+    members = opts.get('extract_members')
+    if not opts.get('remote_extract') or not members:
+        return None
+    if (getattr(app, 'download_hashes', {}) or {}).get(name):
+        return None
+    manager = downloads.get_manager()
+    if manager.bundle is not None and manager.bundle.lookup(url):
+        # Im Offline-Bundle vorhanden -> ganzes ZIP lokal statt Netzwerk
+        return None
+    if manager.peers:
+        # LAN-Peer vorhanden -> ganzes ZIP aus dem LAN (füllt auch den Cache)
+        return None
+    try:
+        host = downloads.host_of(url)
+        # Ein Versuch; der Fallback ist der normale Download mit Retry
+        ex = retry.call(
+            lambda: remote_zip.extract_remote(
+                url, out, members, session=manager.session,
+                throttle=manager.shaper.throttle_for(host, priority),
+                cancel=phase_cancel),
+            "remote_zip", key=host, log=app.log, attempts=1)
+    except cancel.Cancelled:
+        raise
+    except Exception as e:
+        log_event(app.log, "remote_zip_fallback", name=name, url=url,
+                  err=f"{type(e).__name__}: {e}")
+        return None
+    log_event(app.log, "remote_unzip_ok", name=name, dest_dir=out,
+              extracted=ex.extracted, skipped=ex.skipped, bytes=ex.bytes,
+              fetched=ex.fetched, requests=ex.requests, seconds=ex.seconds)
+    return ex
+
+
+def _stage_fetch(app: Any, item: pipeline.PipelineItem) -> None:
+    """Pipeline-Stufe Netzwerk: Transfer mit Auto-Retry."""
+    name, url, fp = item.key, item.payload['url'], item.payload['dest']
+    manager = downloads.get_manager()
+    tracker = item.payload.get('progress')
+    phase_cancel = item.payload.get('cancel')
+    if tracker is not None:
+        tracker.enter('fetch')
+    if name in ('talon', 'exm_tweaks') and not item.payload.get('remote'):
+        out = os.path.join(app.download_dir, name)
+        ex = _try_remote_extract(app, name, url, out, ratelimit.FOREGROUND,
+                                 phase_cancel)
+        if ex is not None:
+            # Nur benötigte Member geladen; Prüfen/Entpacken entfallen
+            item.payload['remote'] = ex
+            item.payload['result'] = downloads.DownloadResult(
+                url=url, dest=out, bytes=ex.fetched, seconds=ex.seconds,
+                source=url)
+            return
+    attempts = {'n': 0}
+
+    def _fetch():
+        attempts['n'] += 1
+        log_event(app.log, "download_start", name=name, url=url,
+                  filename=item.payload['filename'], dest=fp,
+                  attempt=attempts['n'], pipeline_attempt=item.attempt)
+        return manager.fetch(url, fp, _fetch_options(app, name),
+                             priority=ratelimit.FOREGROUND, progress=tracker,
+                             cancel=phase_cancel)
+
+    item.payload['result'] = retry.call(
+        _fetch, "download", key=downloads.host_of(url), log=app.log,
+        cancel=phase_cancel, name=name, filename=item.payload['filename'],
+        dest=fp)
+
+
+def _stage_verify(app: Any, item: pipeline.PipelineItem) -> None:
+    """Pipeline-Stufe Prüfung: Hash gegen download_hashes."""
+    if item.payload.get('progress') is not None:
+        item.payload['progress'].enter('verify')
+    if item.payload.get('remote'):
+        return
+    _verify_download(app, item.key, item.payload['result'])
+
+
+def _stage_extract(app: Any, item: pipeline.PipelineItem) -> None:
+    """Pipeline-Stufe Entpacken (nur Talon/EXM-ZIPs)."""
+    name, fp = item.key, item.payload['dest']
+    if item.payload.get('progress') is not None:
+        item.payload['progress'].enter('extract')
+    if item.payload.get('remote'):
+        return
+    if name in ('talon', 'exm_tweaks') and fp.lower().endswith('.zip'):
+        out = os.path.join(app.download_dir, name)
+        try:
+            ex = extract.extract_zip(
+                fp, out,
+                _download_options(app).get(name, {}).get('extract_members'),
+                cancel=item.payload.get('cancel'))
+        except zipfile.BadZipFile:
+            # Defekte Kopie nicht erneut aus dem Cache liefern
+            downloads.get_manager().forget(item.payload['url'])
+            raise
+        item.payload['extracted'] = ex
+        log_event(app.log, "unzipped", name=name, src_zip=fp, dest_dir=out,
+                  extracted=ex.extracted, skipped=ex.skipped,
+                  bytes=ex.bytes, workers=ex.workers, seconds=ex.seconds)
+
 
 def download_files(app: Any, token: int) -> None:
-    """Lädt benötigte Dateien herunter."""
+    """Lädt benötigte Dateien herunter.
+
+    Ablauf als Pipeline (Netzwerk -> Prüfung -> Entpacken), damit der
+    Transfer eines Artefakts mit dem Entpacken des vorherigen überlappt.
+    Artefakte, deren lokale Kopie noch zu links.lock passt, werden ohne
+    Netzwerkzugriff übersprungen; erfolgreiche landen danach im Lock.
+    """
     app.log.phase = "download"
+    phase_cancel = app.phase_cancel
     try:
+        manager = downloads.get_manager()
         total = len(app.download_urls)
-        done = 0
-        session = requests.Session()
-        for name, url in app.download_urls.items():
-            app.ui_set(text=f"Lade {name}...", token=token)
-            app.ui_set(percent=int((done / total) * 100), token=token)
-            t0 = time.time()
-
-            if name == 'talon':
-                filename = 'TalonLite.zip' if app.is_win10 else 'talon.zip'
-                fp = os.path.join(app.download_dir, filename)
-            elif name == 'exm_tweaks':
-                filename = 'exm_tweaks.zip'
-                fp = os.path.join(app.download_dir, filename)
-            elif name == 'boosterx':
-                filename = 'BoosterX.exe'
-                fp = os.path.join(app.download_dir, 'boosterx', filename)
-                utils.ensure_dir(os.path.dirname(fp))
-            else:
-                filename = 'unknown.bin'
-                fp = os.path.join(app.download_dir, filename)
+        state = {"done": 0}
 
-            max_attempts = 3
-            attempt = 0
-            while True:
-                try:
-                    log_event(app.log, "download_start", name=name, url=url,
-                              filename=filename, dest=fp, attempt=attempt + 1)
-                    r = session.get(url, stream=True, timeout=120)
-                    r.raise_for_status()
-                    with open(fp, 'wb') as f:
-                        for chunk in r.iter_content(8192):
-                            if chunk:
-                                f.write(chunk)
-
-                    expected = getattr(app, 'download_hashes', {}).get(name)
-                    if expected:
-                        try:
-                            algo, hexval = (expected.split(":", 1) + [
-                                None])[:2] if ":" in expected else (
-                                    "sha256", expected)
-                            hexval = (hexval or "").strip().lower()
-                            if algo.lower() != "sha256":
-                                raise ValueError("Only sha256 is supported")
-                            actual = utils.compute_sha256(fp)
-                            if actual.lower() != hexval:
-                                raise ValueError(
-                                    f"SHA256-Mismatch: expected {hexval}, "
-                                    f"got {actual}")
-                            log_event(app.log, "download_hash_ok", name=name,
-                                      filename=filename, dest=fp,
-                                      sha256_expected=hexval,
-                                      sha256_actual=actual)
-                        except Exception as he:
-                            log_event(
-                                app.log, "download_hash_fail", name=name,
-                                filename=filename, dest=fp,
-                                sha256_expected=hexval, err=str(he))
-                            raise
-
-                    if name in ('talon', 'exm_tweaks') and \
-                            filename.lower().endswith('.zip'):
-                        out = os.path.join(app.download_dir, name)
-                        os.makedirs(out, exist_ok=True)
-                        with zipfile.ZipFile(fp, 'r') as z:
-                            z.extractall(out)
-                        log_event(app.log, "unzipped", name=name,
-                                  src_zip=fp, dest_dir=out)
-
-                    dt = round(time.time() - t0, 2)
-                    file_bytes = os.path.getsize(fp)
-                    log_event(app.log, "download_ok", name=name,
-                              filename=filename, dest=fp, seconds=dt,
-                              bytes=file_bytes)
-                    break
-                except Exception as e:
-                    attempt += 1
-                    if attempt < max_attempts:
-                        delay = 2 ** attempt
-                        log_event(app.log, "download_retry", name=name,
-                                  filename=filename, dest=fp, attempt=attempt,
-                                  delay_s=delay)
-                        time.sleep(delay)
-                        continue
-                    if Messagebox.askretrycancel(
-                        "Error", f"Download failed for {name}: {e}\n\nRetry?"
-                    ):
-                        attempt = 0
-                        continue
-                    else:
-                        log_event(
-                            app.log, "download_fail", name=name,
-                            filename=filename, dest=fp, err=type(e).__name__)
-                        return
+        def _on_progress(percent: int, text: str) -> None:
+            app.ui_set(percent=percent,
+                       text=f"{state['done']}/{total} geladen · {text}",
+                       token=token)
 
-            done += 1
+        # Byte-genauer Fortschritt inkl. Prüf-/Entpack-Anteil, gedrosselt
+        model = progress.ProgressModel(app.download_urls, _on_progress)
+
+        def _on_done(item: pipeline.PipelineItem) -> None:
+            if isinstance(item.error, cancel.Cancelled):
+                return
+            if item.error is not None:
+                log_event(app.log, "download_stage_fail", name=item.key,
+                          stage=item.failed_stage, err=str(item.error),
+                          timings=item.timings)
+                return
+            result = item.payload['result']
+            tracker = model.item(item.key)
+            rate = tracker.throughput()
+            state["done"] += 1
+            tracker.finish()
+            _lock_record(app, item.key, result,
+                         item.payload.get('remote')
+                         or item.payload.get('extracted'))
+            log_event(app.log, "download_ok", name=item.key,
+                      filename=item.payload['filename'],
+                      dest=item.payload['dest'],
+                      seconds=round(sum(item.timings.values()), 2),
+                      bytes=result.bytes, sha256=result.sha256,
+                      resumed_from=result.resumed_from,
+                      segments=result.segments, from_cache=result.from_cache,
+                      not_modified=result.not_modified,
+                      source=result.source, failovers=result.failovers,
+                      remote=bool(item.payload.get('remote')),
+                      fetch_s=item.timings.get('fetch'),
+                      verify_s=item.timings.get('verify'),
+                      extract_s=item.timings.get('extract'),
+                      throughput_kbps=round(rate / 1024, 1) if rate else None)
+
+        pending = {}
+        for name, url in app.download_urls.items():
+            if _locked(app, name, url):
+                state["done"] += 1
+                model.item(name).finish()
+            else:
+                pending[name] = url
+        # Ist alles gesperrt, steht der Fortschritt schon auf 100 %
+        if pending:
+            app.ui_set(text=f"Lade {', '.join(pending)}...", token=token)
+            app.ui_set(percent=0, token=token)
+        while pending:
+            items = []
+            for name, url in pending.items():
+                filename, fp = _download_target(app, name)
+                items.append(pipeline.PipelineItem(
+                    key=name,
+                    payload={'url': url, 'dest': fp, 'filename': filename,
+                             'progress': model.item(name),
+                             'cancel': phase_cancel}))
+            pipe = pipeline.Pipeline(
+                [('fetch', lambda it: _stage_fetch(app, it),
+                  manager.max_workers),
+                 ('verify', lambda it: _stage_verify(app, it), 1),
+                 ('extract', lambda it: _stage_extract(app, it), 1)],
+                queue_size=2, max_attempts=2, on_done=_on_done)
+            failed = [it for it in pipe.run(items) if it.error is not None]
+            if phase_cancel.cancelled:
+                # Phase verlassen: keine Dialoge, .part-Dateien bleiben
+                log_event(app.log, "download_cancelled",
+                          open=[it.key for it in failed])
+                return
+            pending = {}
+            # Dialoge nacheinander, nachdem alle parallelen Transfers fertig sind
+            for it in failed:
+                e = it.error
+                if Messagebox.askretrycancel(
+                    "Error", f"Download failed for {it.key}: {e}\n\nRetry?"
+                ):
+                    pending[it.key] = app.download_urls[it.key]
+                    # Manueller Retry: Host nicht weiter als ausgefallen führen
+                    retry.breaker.reset(
+                        downloads.host_of(app.download_urls[it.key]))
+                else:
+                    log_event(
+                        app.log, "download_fail", name=it.key,
+                        filename=it.payload['filename'],
+                        dest=it.payload['dest'], err=type(e).__name__)
+                    return
 
         app.ui_set(percent=100, text="Downloads abgeschlossen!", token=token)
         app.downloads_completed = True
@@ -489,45 +800,43 @@ def is_boosterx_installed(app: Any) -> bool:
     boosterx_exe = os.path.join(app.download_dir, 'boosterx', 'BoosterX.exe')
     return os.path.exists(boosterx_exe)
 
-def start_exm(app: Any) -> None:
-    """Starts EXM Tweaks after confirmation; without busy cursor."""
+def start_exm(app: Any, _repaired: bool = False) -> None:
+    """Starts EXM Tweaks after confirmation; without busy cursor.
+
+    A missing installation is provided in the background (see
+    _provide_tool); start_exm then runs again with `_repaired` set.
+    """
     app.log.phase = "exmhub"
     try:
         # Überprüfe ob EXM bereits installiert ist
         exm_installed = is_exm_installed(app)
         
         # Vorab-Dialog (modal). Abbruch öffnet nichts
-        if not _confirm_elevated_start(app, title="EXM Tweaks", tool_name="EXM Tweaks"):
+        if not _repaired and not _confirm_elevated_start(app, title="EXM Tweaks", tool_name="EXM Tweaks"):
             return
 
-        # Automatische Installation wenn nicht vorhanden
-        if not exm_installed:
-            log_event(app.log, "exm_auto_install_start")
-            # Automatische Installation ohne Nachfrage
-            try:
-                _attempt_repair_exm(app, os.path.join(app.download_dir, 'exm_tweaks'))
-                log_event(app.log, "exm_auto_install_completed")
-            except Exception as e:
-                log_event(app.log, "exm_auto_install_failed", err=str(e))
-                Messagebox.showerror("Error", f"EXM Tweaks could not be automatically installed: {e}")
-                return
-
         # Busy-Cursor für EXM auf Wunsch entfernen (keine Anzeige)
 
         exm_dir = os.path.join(app.download_dir, 'exm_tweaks')
         target_cmd = os.path.join(exm_dir, '!EXM Free Tweaking Utility V9.3.cmd')
+        if not _repaired and (not exm_installed or not os.path.exists(target_cmd)):
+            # Automatische Installation/Reparatur ohne Nachfrage, aber nicht im
+            # UI-Thread: ZIP erneut entpacken oder neu laden, dann erneut starten
+            if not exm_installed:
+                log_event(app.log, "exm_auto_install_start")
+            _provide_tool(app, 'exm_tweaks',
+                          lambda: _attempt_repair_exm(app, exm_dir),
+                          lambda: start_exm(app, _repaired=True))
+            return
         if not os.path.exists(target_cmd):
-            # Reparaturversuch: ZIP erneut entpacken oder Datei im Ordner suchen
-            _attempt_repair_exm(app, exm_dir)
-            if not os.path.exists(target_cmd):
-                # Suche nach einer passenden .cmd-Datei, falls der Name abweicht
-                for root_dir, _, files in os.walk(exm_dir):
-                    for f in files:
-                        if f.lower().endswith('.cmd') and 'exm' in f.lower():
-                            target_cmd = os.path.join(root_dir, f)
-                            break
-                    if os.path.exists(target_cmd):
+            # Suche nach einer passenden .cmd-Datei, falls der Name abweicht
+            for root_dir, _, files in os.walk(exm_dir):
+                for f in files:
+                    if f.lower().endswith('.cmd') and 'exm' in f.lower():
+                        target_cmd = os.path.join(root_dir, f)
                         break
+                if os.path.exists(target_cmd):
+                    break
             if not os.path.exists(target_cmd):
                 raise FileNotFoundError(f"EXM Batch-Datei nicht gefunden: {target_cmd}")
         
@@ -568,29 +877,29 @@ def start_exm(app: Any) -> None:
         Messagebox.showerror("Error", f"EXM Tweaks could not be started: {e}")
         # Kein Cursor-Reset nötig
 
-def start_boosterx(app: Any) -> None:
-    """Starts BoosterX after confirmation; shows 1s busy cursor during startup."""
+def start_boosterx(app: Any, _repaired: bool = False) -> None:
+    """Starts BoosterX after confirmation; shows 1s busy cursor during startup.
+
+    A missing BoosterX.exe is downloaded in the background (see
+    _provide_tool); start_boosterx then runs again with `_repaired` set.
+    """
     app.log.phase = "tweakerhub"
     try:
         # Überprüfe ob BoosterX bereits installiert ist
         boosterx_installed = is_boosterx_installed(app)
         
         # Vorab-Dialog (modal). Abbruch öffnet nichts
-        if not _confirm_elevated_start(app, title="BoosterX", tool_name="BoosterX"):
+        if not _repaired and not _confirm_elevated_start(app, title="BoosterX", tool_name="BoosterX"):
             return
 
-        # Automatische Installation wenn nicht vorhanden
-        if not boosterx_installed:
+        # Automatische Installation ohne Nachfrage, aber nicht im UI-Thread
+        if not boosterx_installed and not _repaired:
             log_event(app.log, "boosterx_auto_install_start")
-            # Automatische Installation ohne Nachfrage
-            try:
-                boosterx_exe = os.path.join(app.download_dir, 'boosterx', 'BoosterX.exe')
-                _attempt_repair_boosterx(app, boosterx_exe)
-                log_event(app.log, "boosterx_auto_install_completed")
-            except Exception as e:
-                log_event(app.log, "boosterx_auto_install_failed", err=str(e))
-                Messagebox.showerror("Error", f"BoosterX could not be automatically installed: {e}")
-                return
+            boosterx_exe = os.path.join(app.download_dir, 'boosterx', 'BoosterX.exe')
+            _provide_tool(app, 'boosterx',
+                          lambda: _attempt_repair_boosterx(app, boosterx_exe),
+                          lambda: start_boosterx(app, _repaired=True))
+            return
 
         # Busy-Cursor kurz (1s) anzeigen
         try:
@@ -601,9 +910,7 @@ def start_boosterx(app: Any) -> None:
 
         boosterx_exe = os.path.join(app.download_dir, 'boosterx', 'BoosterX.exe')
         if not os.path.exists(boosterx_exe):
-            _attempt_repair_boosterx(app, boosterx_exe)
-            if not os.path.exists(boosterx_exe):
-                raise FileNotFoundError(f"BoosterX-Executable nicht gefunden: {boosterx_exe}")
+            raise FileNotFoundError(f"BoosterX-Executable nicht gefunden: {boosterx_exe}")
         
         # GEMINI PATCH START: Start BoosterX with PID tracking
         ps_cmd = f"$p = Start-Process -FilePath '{boosterx_exe}' -Verb RunAs -PassThru; $p.Id"
@@ -746,34 +1053,208 @@ def wait_for_process_exit(app: Any, pid: int, tag: str) -> None:
         log_event(app.log, "process_did_not_exit", pid=pid, tag=tag)
         app.root.after(0, lambda: Messagebox.showwarning("Note", f"{tag.upper()} was not terminated or could not be monitored."))
 
+# Verhindert einen zweiten Prefetch-Thread
+_prefetch_lock = threading.Lock()
+# Pro Tool: Prefetch und Reparatur desselben Tools laufen nacheinander
+# (gleiche ZIP/Zielordner); verschiedene Tools blockieren sich nicht
+_tool_locks = {'exm_tweaks': threading.Lock(), 'boosterx': threading.Lock()}
+# Tools, die gerade für einen Start bereitgestellt werden
+_providing = set()
+_providing_lock = threading.Lock()
+
+
+def _provide_tool(app: Any, name: str, repair: Callable[[], None],
+                  then: Callable[[], None]) -> None:
+    """Führt `repair` in einem Worker aus und danach `then` im UI-Thread.
+
+    Ein zweiter Klick, während dasselbe Tool noch bereitgestellt wird,
+    startet nichts Neues.
+    """
+    with _providing_lock:
+        if name in _providing:
+            log_event(app.log, "tool_provide_busy", name=name)
+            return
+        _providing.add(name)
+
+    def _worker():
+        try:
+            repair()
+            log_event(app.log, "tool_provided", name=name)
+        finally:
+            with _providing_lock:
+                _providing.discard(name)
+            app.root.after(0, then)
+
+    threading.Thread(target=_worker, daemon=True,
+                     name=f"{name}-provide").start()
+
+
+def _tweaker_ready(app: Any, name: str) -> bool:
+    if name == 'exm_tweaks':
+        return is_exm_installed(app)
+    if name == 'boosterx':
+        return is_boosterx_installed(app)
+    return False
+
+
+def _prefetch_one(app: Any, name: str, url: str) -> str:
+    """Stellt ein Tweaker-Tool bereit; liefert, wie es bereitgestellt wurde."""
+    _, fp = _download_target(app, name)
+    state = app.tweaker_prefetch.get(name) or {}
+    if state.get('url') == url and _tweaker_ready(app, name):
+        return 'ready'
+    if _locked(app, name, url):
+        app.tweaker_prefetch[name] = dict(state, url=url, at=time.time())
+        return 'locked'
+    manager = downloads.get_manager()
+    result = None
+    if state.get('url') == url and state.get('sha256') and \
+            manager.restore(state['sha256'], fp):
+        # Nach dem Talon-Neustart direkt aus dem Artefakt-Cache
+        how = 'restored'
+    else:
+        result = retry.call(
+            lambda: manager.fetch(url, fp, _fetch_options(app, name),
+                                  priority=ratelimit.BACKGROUND),
+            "prefetch", key=downloads.host_of(url), log=app.log, name=name)
+        try:
+            _verify_download(app, name, result)
+        except ValueError:
+            # Unverifizierte Datei nicht liegen lassen (Reparatur entpackt sie)
+            os.remove(fp)
+            raise
+        state = {'url': url, 'sha256': result.sha256}
+        how = 'cache' if result.from_cache else 'downloaded'
+    ex = None
+    if name == 'exm_tweaks':
+        ex = extract.extract_zip(fp, os.path.join(app.download_dir, name),
+                                 _exm_members(app))
+    if result is not None:
+        _lock_record(app, name, result, ex)
+    app.tweaker_prefetch[name] = dict(state, at=time.time())
+    return how
+
+
+def warm_connections(app: Any) -> None:
+    """Wärmt im Hintergrund die Verbindungen zu allen Download-Hosts vor.
+
+    Läuft beim Start, während Restore- und Antivirus-Phase angezeigt werden,
+    damit der erste echte Download ohne DNS/TCP/TLS-Aufbau beginnt. Deckt
+    download_urls, tweaker_urls und guide_downloads samt Spiegeln sowie die
+    LAN-Peers ab.
+    """
+    urls = []
+    for attr in ('download_urls', 'tweaker_urls', 'guide_downloads'):
+        urls.extend((getattr(app, attr, None) or {}).values())
+    for opts in _download_options(app).values():
+        urls.extend(opts.get('mirrors') or [])
+    # LAN-Peers werden vor jedem Upstream-Download gefragt
+    urls.extend(downloads.get_manager().peers)
+
+    def _worker():
+        t0 = time.time()
+        results = downloads.get_manager().warm_up(urls)
+        log_event(app.log, "connections_warmed", hosts=len(results),
+                  failed=sum(1 for info in results.values() if "err" in info),
+                  saved_ms=round(sum(info.get("saved_ms", 0.0)
+                                     for info in results.values()), 1),
+                  seconds=round(time.time() - t0, 2))
+
+    threading.Thread(target=_worker, daemon=True, name="net-warmup").start()
+
+
+def prefetch_tweakers(app: Any) -> None:
+    """Lädt EXM Tweaks/BoosterX im Hintergrund vor (niedrige Priorität).
+
+    Wird in den Phasen davor aufgerufen, damit der Tweaker Hub die Tools
+    sofort starten kann. Der Stand (URL + SHA-256) landet im Status-JSON
+    und übersteht so den Talon-Neustart. Läuft bereits ein Prefetch,
+    passiert nichts.
+    """
+    if not isinstance(getattr(app, 'tweaker_prefetch', None), dict):
+        app.tweaker_prefetch = {}
+    if not _prefetch_lock.acquire(blocking=False):
+        return
+
+    def _worker():
+        try:
+            for name, url in (getattr(app, 'tweaker_urls', {}) or {}).items():
+                if not url:
+                    continue
+                done_flag = {'exm_tweaks': 'exm_done_once',
+                             'boosterx': 'boosterx_done_once'}.get(name)
+                if done_flag and getattr(app, done_flag, False):
+                    # Bereits benutzt (und danach automatisch entfernt)
+                    continue
+                t0 = time.time()
+                try:
+                    with _tool_locks[name]:
+                        how = _prefetch_one(app, name, url)
+                    log_event(app.log, "prefetch_ok", name=name, how=how,
+                              seconds=round(time.time() - t0, 2))
+                except Exception as e:
+                    log_event(app.log, "prefetch_fail", name=name,
+                              err=str(e))
+            app.save_status()
+        finally:
+            _prefetch_lock.release()
+
+    threading.Thread(target=_worker, daemon=True,
+                     name="tweaker-prefetch").start()
+
+
+def _exm_members(app) -> Optional[list]:
+    return _download_options(app).get('exm_tweaks', {}).get('extract_members')
+
 def _attempt_repair_exm(app, exm_dir: str):
     """Versucht EXM erneut bereitzustellen (Zip entpacken oder erneut laden)."""
+    # Nur einen laufenden EXM-Prefetch abwarten (nie im UI-Thread aufrufen)
+    with _tool_locks['exm_tweaks']:
+        _repair_exm(app, exm_dir)
+
+def _repair_exm(app, exm_dir: str):
     try:
         base = app.download_dir
         real_dir = os.path.join(base, 'exm_tweaks')
         utils.ensure_dir(real_dir)
         zip_fp = os.path.join(app.download_dir, 'exm_tweaks.zip')
+        url = (getattr(app, 'tweaker_urls', {}) or {}).get('exm_tweaks')
+        if os.path.exists(zip_fp) and not _file_trusted(
+                app, 'exm_tweaks', url, zip_fp):
+            log_event(app.log, "exm_repair_zip_untrusted", zip=zip_fp)
+            os.remove(zip_fp)
         if os.path.exists(zip_fp):
             try:
-                with zipfile.ZipFile(zip_fp, 'r') as z:
-                    z.extractall(real_dir)
-                log_event(app.log, "exm_repair_unzip_ok", zip=zip_fp, dest=exm_dir)
+                ex = extract.extract_zip(
+                    zip_fp, real_dir, _exm_members(app))
+                log_event(app.log, "exm_repair_unzip_ok", zip=zip_fp, dest=exm_dir,
+                          extracted=ex.extracted, skipped=ex.skipped)
                 return
             except Exception as e:
                 log_event(app.log, "exm_repair_unzip_fail", zip=zip_fp, err=str(e))
         # Falls ZIP fehlt: neu laden (aus tweaker_urls, Fallback download_urls)
-        url = (getattr(app, 'tweaker_urls', {}) or {}).get('exm_tweaks')
+        if url and _try_remote_extract(app, 'exm_tweaks', url, real_dir,
+                                       ratelimit.BACKGROUND):
+            return
         if url:
             try:
-                r = requests.get(url, stream=True, timeout=120)
-                r.raise_for_status()
-                with open(zip_fp, 'wb') as f:
-                    for chunk in r.iter_content(8192):
-                        if chunk:
-                            f.write(chunk)
-                with zipfile.ZipFile(zip_fp, 'r') as z:
-                    z.extractall(real_dir)
-                log_event(app.log, "exm_repair_redownload_ok", url=url)
+                result = retry.call(
+                    lambda: downloads.get_manager().fetch(
+                        url, zip_fp, _fetch_options(app, 'exm_tweaks'),
+                        priority=ratelimit.BACKGROUND),
+                    "exm_repair_download", key=downloads.host_of(url),
+                    log=app.log)
+                try:
+                    _verify_download(app, 'exm_tweaks', result)
+                except ValueError:
+                    # Unverifiziertes ZIP nicht liegen lassen
+                    os.remove(zip_fp)
+                    raise
+                extract.extract_zip(zip_fp, real_dir, _exm_members(app))
+                log_event(app.log, "exm_repair_redownload_ok", url=url,
+                          bytes=result.bytes, sha256=result.sha256,
+                          resumed_from=result.resumed_from,
+                          from_cache=result.from_cache)
             except Exception as e:
                 log_event(app.log, "exm_repair_redownload_fail", url=url, err=str(e))
     except Exception as e:
@@ -781,6 +1262,10 @@ def _attempt_repair_exm(app, exm_dir: str):
 
 def _attempt_repair_boosterx(app, boosterx_exe: str):
     """Versucht BoosterX erneut bereitzustellen (Ordner anlegen und neu laden)."""
+    with _tool_locks['boosterx']:
+        _repair_boosterx(app, boosterx_exe)
+
+def _repair_boosterx(app, boosterx_exe: str):
     try:
         base = app.download_dir
         bx_dir = os.path.join(base, 'boosterx')
@@ -790,13 +1275,22 @@ def _attempt_repair_boosterx(app, boosterx_exe: str):
         url = (getattr(app, 'tweaker_urls', {}) or {}).get('boosterx')
         if url:
             try:
-                r = requests.get(url, stream=True, timeout=120)
-                r.raise_for_status()
-                with open(boosterx_exe, 'wb') as f:
-                    for chunk in r.iter_content(8192):
-                        if chunk:
-                            f.write(chunk)
-                log_event(app.log, "boosterx_repair_redownload_ok", url=url)
+                result = retry.call(
+                    lambda: downloads.get_manager().fetch(
+                        url, boosterx_exe, _fetch_options(app, 'boosterx'),
+                        priority=ratelimit.BACKGROUND),
+                    "boosterx_repair_download", key=downloads.host_of(url),
+                    log=app.log)
+                try:
+                    _verify_download(app, 'boosterx', result)
+                except ValueError:
+                    # Unverifizierte EXE nicht liegen lassen
+                    os.remove(boosterx_exe)
+                    raise
+                log_event(app.log, "boosterx_repair_redownload_ok", url=url,
+                          bytes=result.bytes, sha256=result.sha256,
+                          resumed_from=result.resumed_from,
+                          from_cache=result.from_cache)
             except Exception as e:
                 log_event(app.log, "boosterx_repair_redownload_fail", url=url, err=str(e))
     except Exception as e:
@@ -811,9 +1305,12 @@ def install_selected_apps_choco(app: Any) -> None:
         Messagebox.showinfo("Info", "No apps selected.")
         return
 
+    phase_cancel = app.phase_cancel
+
     def _worker():
         app.log.phase = "apps"
         fail = []
+        cancelled = False
         
         # UI-Status setzen - Installation läuft
         app.root.after(0, lambda: setattr(app, '_apps_installing', True))
@@ -824,21 +1321,29 @@ def install_selected_apps_choco(app: Any) -> None:
         
         try:
             for a in sel:
-                if not choco_upgrade(app, a["pkg"], prerelease=a.get("prerelease", False)):
+                phase_cancel.raise_if_cancelled()
+                if not choco_upgrade(app, a["pkg"], prerelease=a.get("prerelease", False),
+                                     phase_cancel=phase_cancel):
                     fail.append(a["name"])
+        except cancel.Cancelled:
+            cancelled = True
         finally:
             # UI-Status zurücksetzen - Installation beendet
             app.root.after(0, lambda: setattr(app, '_apps_installing', False))
-            app.root.after(0, lambda: app._install_button.config(state="normal", text="Install Selected with Chocolatey"))
-            app.root.after(0, lambda: app._continue_button.config(state="normal", text="Continue to Guide (skip)"))
-            app.root.after(0, lambda: app._back_button.config(state="normal", text="← Back (EXM Tweaks)"))
-            app.root.after(0, app._choco_progress_stop_hide)
-            
-            if fail:
-                app.root.after(0, lambda: Messagebox.showwarning("Done (with errors)", f"Failed for: {', '.join(fail)}"))
+            if cancelled:
+                # Phase verlassen: Widgets existieren nicht mehr
+                log_event(app.log, "apps_install_cancelled", failed=len(fail))
             else:
-                app.root.after(0, lambda: Messagebox.showinfo("Done", "All selected apps have been installed/updated."))
-            log_event(app.log, "apps_install_done", failed=len(fail))
+                app.root.after(0, lambda: app._install_button.config(state="normal", text="Install Selected with Chocolatey"))
+                app.root.after(0, lambda: app._continue_button.config(state="normal", text="Continue to Guide (skip)"))
+                app.root.after(0, lambda: app._back_button.config(state="normal", text="← Back (EXM Tweaks)"))
+                app.root.after(0, app._choco_progress_stop_hide)
+            
+                if fail:
+                    app.root.after(0, lambda: Messagebox.showwarning("Done (with errors)", f"Failed for: {', '.join(fail)}"))
+                else:
+                    app.root.after(0, lambda: Messagebox.showinfo("Done", "All selected apps have been installed/updated."))
+                log_event(app.log, "apps_install_done", failed=len(fail))
     
     threading.Thread(target=_worker, daemon=True, name="choco-worker").start()
 
@@ -859,7 +1364,8 @@ def _create_restore_point(app: Any) -> None:
                 "try { Enable-ComputerRestore -Drive $drive -ErrorAction SilentlyContinue } catch {} ; "
                 "Checkpoint-Computer -Description 'Windows Optimizer – Start' -RestorePointType 'APPLICATION_INSTALL'"
             )
-            subprocess.check_call(['powershell.exe', '-NoProfile', '-ExecutionPolicy', 'Bypass', '-Command', ps])
+            retry.call(lambda: subprocess.check_call(['powershell.exe', '-NoProfile', '-ExecutionPolicy', 'Bypass', '-Command', ps]),
+                       "restore_create", log=app.log, attempts=2)
             log_event(app.log, "restore_create_ok")
             app.restore_last_action = "created"
             app.restore_last_point = "(neu erstellt)"
@@ -917,7 +1423,8 @@ def _choose_and_restore_point(app: Any) -> None:
     def _load_points():
         try:
             ps = "Get-ComputerRestorePoint | Select-Object SequenceNumber, Description, CreationTime | Sort-Object CreationTime -Descending | ConvertTo-Json -Depth 3"
-            out = subprocess.check_output(['powershell.exe', '-NoProfile', '-ExecutionPolicy', 'Bypass', '-Command', ps], text=True, errors='ignore')
+            out = retry.call(lambda: subprocess.check_output(['powershell.exe', '-NoProfile', '-ExecutionPolicy', 'Bypass', '-Command', ps], text=True, errors='ignore'),
+                             "restore_list", log=app.log, attempts=2)
             
             log_event(app.log, "restore_powershell_output", output_length=len(out), output_preview=out[:200])
             
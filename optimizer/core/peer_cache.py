@@ -0,0 +1,166 @@
+import json
+import os
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from . import artifact_cache
+from .logging_setup import log_event
+
+# Standard-Port des LAN-Caches (links.json "network" -> "peers")
+PEER_PORT = 8765
+SEND_CHUNK = 1024 * 1024
+
+_OBJECT_PATH = re.compile(r"^/objects/([0-9a-f]{64})$")
+_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """Parses a single "bytes=a-b" range into (start, end inclusive).
+
+    Returns None for headers we do not handle (multiple ranges, other
+    units); the caller then sends the whole file.
+
+    Raises:
+        ValueError: If the range cannot be satisfied for `size` bytes.
+    """
+    m = _RANGE.match(header.strip())
+    if not m or not (m.group(1) or m.group(2)):
+        return None
+    if not m.group(1):
+        # Suffix: die letzten n Bytes
+        n = int(m.group(2))
+        if n == 0 or size == 0:
+            raise ValueError("empty suffix range")
+        return max(0, size - n), size - 1
+    start = int(m.group(1))
+    end = int(m.group(2)) if m.group(2) else size - 1
+    if start >= size or end < start:
+        raise ValueError(f"range {start}-{end} outside 0-{size - 1}")
+    return start, min(end, size - 1)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """GET/HEAD /lookup?url=<url> and /objects/<sha256> (with Range)."""
+
+    protocol_version = "HTTP/1.1"
+    server_version = "OptiBundlerPeer/1"
+    server: "PeerServer"
+
+    def do_GET(self) -> None:
+        self._route(head=False)
+
+    def do_HEAD(self) -> None:
+        self._route(head=True)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        # Zugriffe werden gezielt über log_event protokolliert
+        pass
+
+    def _route(self, head: bool) -> None:
+        parts = urlsplit(self.path)
+        m = _OBJECT_PATH.match(parts.path)
+        if m:
+            self._object(m.group(1), head)
+        elif parts.path == "/lookup":
+            url = (parse_qs(parts.query).get("url") or [""])[0]
+            self._lookup(url, head)
+        else:
+            self._empty(404)
+
+    def _empty(self, status: int, **headers: str) -> None:
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name.replace("_", "-"), value)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def _lookup(self, url: str, head: bool) -> None:
+        entry = self.server.cache.lookup(url) if url else None
+        if entry is None:
+            self._empty(404)
+            return
+        body = json.dumps({
+            "sha256": entry["sha256"], "size": entry["size"],
+            "etag": entry.get("etag"),
+            "last_modified": entry.get("last_modified"),
+            "path": f"/objects/{entry['sha256']}",
+        }).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if not head:
+            self.wfile.write(body)
+
+    def _object(self, sha256: str, head: bool) -> None:
+        path = self.server.cache.object_path(sha256)
+        try:
+            f = open(path, 'rb')
+        except OSError:
+            self._empty(404)
+            return
+        with f:
+            size = os.fstat(f.fileno()).st_size
+            etag = f'"{sha256}"'
+            start, end, status = 0, size - 1, 200
+            header = self.headers.get("Range")
+            if_range = self.headers.get("If-Range")
+            if header and (not if_range or if_range == etag):
+                try:
+                    rng = parse_range(header, size)
+                except ValueError:
+                    self._empty(416, Content_Range=f"bytes */{size}")
+                    return
+                if rng is not None:
+                    (start, end), status = rng, 206
+            length = max(0, end - start + 1)
+            self.send_response(status)
+            self.send_header("Content-Type", "application/octet-stream")
+            self.send_header("Content-Length", str(length))
+            self.send_header("Accept-Ranges", "bytes")
+            # Inhaltsadressiert: der Hash ist ein starker Validator
+            self.send_header("ETag", etag)
+            if status == 206:
+                self.send_header("Content-Range",
+                                 f"bytes {start}-{end}/{size}")
+            self.end_headers()
+            if head or not length:
+                return
+            # sendfile(): Kernel kopiert direkt Datei -> Socket (Windows:
+            # automatischer Fallback auf send())
+            sent = self.connection.sendfile(f, offset=start, count=length)
+        if self.server.log is not None:
+            log_event(self.server.log, "peer_serve",
+                      client=self.client_address[0], sha256=sha256,
+                      bytes=sent, offset=start, size=size)
+
+
+class PeerServer(ThreadingHTTPServer):
+    """Serves the local artifact cache to other instances on the LAN.
+
+    Only content-addressed objects are exposed: /lookup maps an upstream
+    URL to its digest and validators, /objects/<sha256> returns the bytes
+    with Range support. The digest a peer reports is not trusted by
+    itself: clients only ask peers for URLs whose hash they already know
+    (links.json "sha256"/"hashes" or links.lock) and accept an object only
+    if it matches that hash (see DownloadManager._from_peer).
+    """
+
+    daemon_threads = True
+
+    def __init__(self, cache: artifact_cache.ArtifactCache,
+                 host: str = "", port: int = PEER_PORT,
+                 log: Optional[Any] = None) -> None:
+        self.cache = cache
+        self.log = log
+        super().__init__((host, port), _Handler)
+
+    def start(self) -> threading.Thread:
+        """Serves in a daemon thread; stop with shutdown()."""
+        thread = threading.Thread(target=self.serve_forever, daemon=True,
+                                  name="peer-cache")
+        thread.start()
+        return thread
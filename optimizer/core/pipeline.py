@@ -0,0 +1,113 @@
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from . import cancel as cancel_mod
+
+# Stage: (Name, Funktion(item), Anzahl Worker-Threads)
+Stage = Tuple[str, Callable[["PipelineItem"], None], int]
+
+_STOP = object()
+
+
+@dataclass
+class PipelineItem:
+    """One artifact travelling through the stages."""
+    key: str
+    payload: Dict[str, Any] = field(default_factory=dict)
+    attempt: int = 1
+    timings: Dict[str, float] = field(default_factory=dict)
+    error: Optional[BaseException] = None
+    failed_stage: Optional[str] = None
+
+
+class Pipeline:
+    """Runs items through sequential stages with bounded queues in between.
+
+    Every stage has its own worker threads, so item B can be in the first
+    stage (network) while item A is already in a later one (extraction).
+    The queues between stages hold at most `queue_size` items; when a later
+    stage falls behind, earlier workers block (backpressure) instead of
+    piling up downloaded-but-unprocessed files.
+
+    Failures in a later stage send the item back to the first stage until
+    `max_attempts` is reached; failures in the first stage end the item
+    (that stage is expected to retry on its own). A cancel.Cancelled from
+    any stage ends the item at once.
+    """
+
+    def __init__(self, stages: List[Stage], queue_size: int = 2,
+                 max_attempts: int = 1,
+                 on_done: Optional[Callable[[PipelineItem], None]] = None
+                 ) -> None:
+        self.stages = stages
+        self.max_attempts = max(1, max_attempts)
+        self.on_done = on_done
+        # Eingang unbegrenzt, damit Wiederholungen nie blockieren
+        self._queues: List[queue.Queue] = [queue.Queue()] + [
+            queue.Queue(maxsize=max(1, queue_size)) for _ in stages[1:]
+        ]
+        self._finished: List[PipelineItem] = []
+        self._cond = threading.Condition()
+
+    def _finish(self, item: PipelineItem) -> None:
+        if self.on_done is not None:
+            try:
+                self.on_done(item)
+            except Exception:
+                pass
+        with self._cond:
+            self._finished.append(item)
+            self._cond.notify_all()
+
+    def _worker(self, index: int) -> None:
+        name, fn, _ = self.stages[index]
+        q_in = self._queues[index]
+        while True:
+            item = q_in.get()
+            if item is _STOP:
+                return
+            t0 = time.time()
+            try:
+                fn(item)
+            except Exception as e:
+                item.timings[name] = round(time.time() - t0, 3)
+                # Abgebrochene Artefakte nicht erneut laden
+                if index > 0 and item.attempt < self.max_attempts and \
+                        not isinstance(e, cancel_mod.Cancelled):
+                    item.attempt += 1
+                    self._queues[0].put(item)
+                    continue
+                item.error = e
+                item.failed_stage = name
+                self._finish(item)
+                continue
+            item.timings[name] = round(time.time() - t0, 3)
+            if index + 1 < len(self.stages):
+                # Blockiert, solange die nächste Stufe voll ist (Backpressure)
+                self._queues[index + 1].put(item)
+            else:
+                self._finish(item)
+
+    def run(self, items: Iterable[PipelineItem]) -> List[PipelineItem]:
+        """Processes all items and blocks until each one finished or failed."""
+        items = list(items)
+        threads = []
+        for index, (name, _, workers) in enumerate(self.stages):
+            for n in range(max(1, workers)):
+                t = threading.Thread(target=self._worker, args=(index,),
+                                     daemon=True, name=f"pipe-{name}-{n}")
+                t.start()
+                threads.append((index, t))
+        for item in items:
+            self._queues[0].put(item)
+        with self._cond:
+            while len(self._finished) < len(items):
+                self._cond.wait()
+        for index, _ in threads:
+            self._queues[index].put(_STOP)
+        for _, t in threads:
+            t.join()
+        return list(self._finished)
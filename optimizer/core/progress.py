@@ -0,0 +1,163 @@
+import threading
+import time
+from typing import Callable, Dict, Iterable, Optional
+
+# Anteil der Stufen am Fortschritt eines Artefakts
+STAGE_WEIGHTS = {"fetch": 0.85, "verify": 0.05, "extract": 0.10}
+STAGES = ("fetch", "verify", "extract")
+# UI höchstens alle 250 ms aktualisieren
+REFRESH_INTERVAL = 0.25
+# Durchsatz: EWMA über Stichproben im Abstand von mindestens 0,5 s
+EWMA_ALPHA = 0.3
+SAMPLE_INTERVAL = 0.5
+
+
+def format_eta(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return "--:--"
+    seconds = int(seconds)
+    if seconds >= 3600:
+        return f"{seconds // 3600}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+    return f"{seconds // 60}:{seconds % 60:02d}"
+
+
+class ItemProgress:
+    """Progress of one artifact; fed by the download manager and pipeline.
+
+    start()/advance() come from the transfer (any thread), enter()/finish()
+    from the pipeline stages.
+    """
+
+    def __init__(self, model: "ProgressModel", key: str) -> None:
+        self.model = model
+        self.key = key
+        self.total: Optional[int] = None
+        self.done = 0
+        self.received = 0
+        self.stage = "fetch"
+        self.finished = False
+        self.fetch_started: Optional[float] = None
+        self.fetch_seconds: Optional[float] = None
+
+    def start(self, total: Optional[int], done: int = 0) -> None:
+        """A transfer begins; `done` bytes already exist (resume)."""
+        with self.model._lock:
+            self.total = total
+            self.done = done
+            if self.fetch_started is None:
+                self.fetch_started = time.monotonic()
+        self.model._notify()
+
+    def advance(self, n: int) -> None:
+        with self.model._lock:
+            self.done += n
+            self.received += n
+            self.model._received += n
+        self.model._notify()
+
+    def enter(self, stage: str) -> None:
+        """Marks all stages before `stage` as complete."""
+        with self.model._lock:
+            if stage != "fetch" and self.fetch_seconds is None and \
+                    self.fetch_started is not None:
+                self.fetch_seconds = time.monotonic() - self.fetch_started
+            self.stage = stage
+        self.model._notify(force=True)
+
+    def finish(self) -> None:
+        with self.model._lock:
+            if self.fetch_seconds is None and self.fetch_started is not None:
+                self.fetch_seconds = time.monotonic() - self.fetch_started
+            self.finished = True
+        self.model._notify(force=True)
+
+    def fraction(self) -> float:
+        if self.finished:
+            return 1.0
+        frac = 0.0
+        for stage in STAGES:
+            if stage == self.stage:
+                if stage == "fetch" and self.total:
+                    frac += STAGE_WEIGHTS[stage] * min(1.0,
+                                                       self.done / self.total)
+                break
+            frac += STAGE_WEIGHTS[stage]
+        return frac
+
+    def throughput(self) -> Optional[float]:
+        """Average bytes/s received in this session (None if unknown)."""
+        if not self.fetch_seconds or not self.received:
+            return None
+        return self.received / self.fetch_seconds
+
+
+class ProgressModel:
+    """Byte-accurate progress over several artifacts with EWMA speed + ETA.
+
+    `on_update(percent, text)` is called at most every REFRESH_INTERVAL
+    seconds (stage changes and completion always go through).
+    """
+
+    def __init__(self, keys: Iterable[str],
+                 on_update: Callable[[int, str], None],
+                 refresh: float = REFRESH_INTERVAL) -> None:
+        self._lock = threading.Lock()
+        self.items: Dict[str, ItemProgress] = {
+            k: ItemProgress(self, k) for k in keys}
+        self.on_update = on_update
+        self.refresh = refresh
+        self._received = 0
+        self._rate: Optional[float] = None
+        self._sample_at = time.monotonic()
+        self._sample_bytes = 0
+        self._last_notify = 0.0
+
+    def item(self, key: str) -> ItemProgress:
+        return self.items[key]
+
+    def _update_rate(self, now: float) -> None:
+        elapsed = now - self._sample_at
+        if elapsed < SAMPLE_INTERVAL:
+            return
+        rate = (self._received - self._sample_bytes) / elapsed
+        self._rate = rate if self._rate is None else (
+            EWMA_ALPHA * rate + (1 - EWMA_ALPHA) * self._rate)
+        self._sample_at, self._sample_bytes = now, self._received
+
+    def snapshot(self) -> Dict[str, Optional[float]]:
+        """percent, bytes done/total, bytes/s (EWMA) and ETA in seconds."""
+        with self._lock:
+            self._update_rate(time.monotonic())
+            items = list(self.items.values())
+            percent = 100 * sum(i.fraction() for i in items) / max(1, len(items))
+            done = sum(i.done for i in items)
+            total = sum(i.total or 0 for i in items)
+            open_items = [i for i in items if i.stage == "fetch"
+                          and not i.finished]
+            remaining = sum(max(0, (i.total or 0) - i.done) for i in open_items)
+            unknown = any(i.total is None for i in open_items)
+            eta = None
+            if self._rate and not unknown:
+                eta = remaining / self._rate
+            return {"percent": percent, "done": done, "total": total,
+                    "rate": self._rate, "eta": eta}
+
+    def text(self, snap: Dict[str, Optional[float]]) -> str:
+        mb = 1024 * 1024
+        parts = [f"{snap['done'] / mb:.1f}/{snap['total'] / mb:.1f} MB"]
+        if snap["rate"]:
+            parts.append(f"{snap['rate'] / mb:.2f} MB/s")
+        parts.append(f"ETA {format_eta(snap['eta'])}")
+        return " · ".join(parts)
+
+    def _notify(self, force: bool = False) -> None:
+        now = time.monotonic()
+        with self._lock:
+            if not force and now - self._last_notify < self.refresh:
+                return
+            self._last_notify = now
+        snap = self.snapshot()
+        try:
+            self.on_update(int(snap["percent"]), self.text(snap))
+        except Exception:
+            pass
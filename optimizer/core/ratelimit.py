@@ -0,0 +1,137 @@
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+# Prioritätsklassen für Transfers
+FOREGROUND = "foreground"
+BACKGROUND = "background"
+
+# Defaults in KiB/s; 0 = unbegrenzt
+MAX_KBPS = 0
+PER_HOST_KBPS = 0
+# Drossel für Hintergrund-Transfers, solange ein Vordergrund-Transfer läuft
+BACKGROUND_KBPS = 512
+
+ENV_VARS = {
+    "max_kbps": "OPTIMIZER_MAX_KBPS",
+    "per_host_kbps": "OPTIMIZER_PER_HOST_KBPS",
+    "background_kbps": "OPTIMIZER_BACKGROUND_KBPS",
+}
+
+
+class TokenBucket:
+    """Classic token bucket; `rate` in bytes/s, 0 disables it.
+
+    reserve() never blocks: it takes the tokens (possibly going into debt)
+    and returns how long the caller has to wait, so several buckets can be
+    charged at once and the caller sleeps for the longest delay only.
+    """
+
+    def __init__(self, rate: float, burst: Optional[float] = None) -> None:
+        self.rate = float(rate)
+        # Standard-Burst: 250 ms bei voller Rate, mindestens 64 KiB
+        self.burst = float(burst or max(self.rate / 4, 64 * 1024))
+        self._tokens = self.burst
+        self._stamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, n: int) -> float:
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst,
+                               self._tokens + (now - self._stamp) * self.rate)
+            self._stamp = now
+            self._tokens -= n
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+
+class Shaper:
+    """Global + per-host bandwidth limits with foreground/background classes.
+
+    Foreground transfers (phase downloads) only see the global and host
+    buckets. Background transfers (prefetch, repairs) additionally share
+    the background bucket while any foreground transfer is active, so they
+    yield bandwidth instead of competing with the user-visible work.
+    """
+
+    def __init__(self, max_kbps: float = MAX_KBPS,
+                 per_host_kbps: float = PER_HOST_KBPS,
+                 background_kbps: float = BACKGROUND_KBPS) -> None:
+        self.max_kbps = max(0.0, float(max_kbps))
+        self.per_host_kbps = max(0.0, float(per_host_kbps))
+        self.background_kbps = max(0.0, float(background_kbps))
+        self._global = TokenBucket(self.max_kbps * 1024)
+        self._background = TokenBucket(self.background_kbps * 1024)
+        self._hosts: Dict[str, TokenBucket] = {}
+        self._foreground = 0
+        self._lock = threading.Lock()
+
+    def _host_bucket(self, host: str) -> TokenBucket:
+        with self._lock:
+            bucket = self._hosts.get(host)
+            if bucket is None:
+                bucket = TokenBucket(self.per_host_kbps * 1024)
+                self._hosts[host] = bucket
+            return bucket
+
+    def begin(self, priority: str) -> None:
+        if priority == FOREGROUND:
+            with self._lock:
+                self._foreground += 1
+
+    def end(self, priority: str) -> None:
+        if priority == FOREGROUND:
+            with self._lock:
+                self._foreground = max(0, self._foreground - 1)
+
+    def foreground_active(self) -> bool:
+        with self._lock:
+            return self._foreground > 0
+
+    def throttle_for(self, host: str,
+                     priority: str = FOREGROUND) -> Callable[[int], None]:
+        """Returns a callback that sleeps as needed after reading n bytes."""
+        host_bucket = self._host_bucket(host)
+
+        def _throttle(n: int) -> None:
+            delay = max(self._global.reserve(n), host_bucket.reserve(n))
+            if priority == BACKGROUND and self.foreground_active():
+                delay = max(delay, self._background.reserve(n))
+            if delay > 0:
+                time.sleep(delay)
+
+        return _throttle
+
+    def describe(self) -> Dict[str, Any]:
+        """Effective limits in KiB/s (0 = unlimited), e.g. for log_event."""
+        return {
+            "max_kbps": self.max_kbps,
+            "per_host_kbps": self.per_host_kbps,
+            "background_kbps": self.background_kbps,
+        }
+
+
+def settings_from(network: Optional[Dict[str, Any]] = None) -> Dict[str, float]:
+    """Merges defaults, the links.json "network" section and env vars.
+
+    Environment variables (OPTIMIZER_MAX_KBPS, ...) win over links.json.
+    """
+    settings = {
+        "max_kbps": float(MAX_KBPS),
+        "per_host_kbps": float(PER_HOST_KBPS),
+        "background_kbps": float(BACKGROUND_KBPS),
+    }
+    for key in settings:
+        for source in ((network or {}).get(key), os.environ.get(ENV_VARS[key])):
+            if source in (None, ""):
+                continue
+            try:
+                settings[key] = max(0.0, float(source))
+            except (TypeError, ValueError):
+                pass
+    return settings
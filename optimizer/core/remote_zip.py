@@ -0,0 +1,189 @@
+import io
+import time
+import zipfile
+from typing import Callable, List, Optional, Tuple
+
+import requests
+
+from . import cancel as cancel_mod
+from . import extract
+from . import http_client
+from . import utils
+from .downloads import RangeNotSupported
+
+# Nachlade-Block für Lesezugriffe außerhalb vorab geladener Bereiche
+BLOCK_SIZE = 1024 * 1024
+# Member-Bereiche mit kleinerer Lücke werden zu einer Anfrage zusammengefasst
+MERGE_GAP = 64 * 1024
+# Lokaler Header: 30 Byte + Name + Extra-Feld (Länge erst dort bekannt)
+LOCAL_HEADER_SLACK = 30 + 1024
+# Größere Bereiche nicht im Speicher halten, sondern blockweise lesen
+MAX_SPAN = 32 * 1024 * 1024
+# Dateiende vorab: EOCD (+ max. 64 KiB Kommentar) und meist das ganze CD
+TAIL_SIZE = 256 * 1024
+# Obergrenze für zwischengespeicherte Bereiche (älteste fliegen zuerst)
+MAX_CACHED_BYTES = 64 * 1024 * 1024
+
+
+class RangeFile(io.RawIOBase):
+    """Read-only, seekable view of a remote file backed by HTTP Range GETs.
+
+    zipfile only needs seek/tell/read, so ZipFile(RangeFile(url)) reads the
+    end-of-central-directory and central directory with a few small
+    requests. prefetch() loads a byte span in one request; reads outside
+    cached spans fetch BLOCK_SIZE at a time. Every request carries If-Range,
+    so a file that changes mid-way fails instead of mixing versions.
+
+    Raises:
+        RangeNotSupported: If the server ignores Range or lacks a length.
+    """
+
+    def __init__(self, url: str, session: Optional[requests.Session] = None,
+                 throttle: Optional[Callable[[int], None]] = None,
+                 cancel: Optional[cancel_mod.CancelToken] = None) -> None:
+        super().__init__()
+        self.session = session or http_client.get_session()
+        self.throttle = throttle
+        self.cancel = cancel
+        r = self.session.head(url, allow_redirects=True,
+                              headers=http_client.IDENTITY,
+                              timeout=http_client.TIMEOUT)
+        r.raise_for_status()
+        length = r.headers.get("Content-Length", "")
+        if "bytes" not in r.headers.get("Accept-Ranges", "").lower() or \
+                not length.isdigit():
+            raise RangeNotSupported(f"No byte ranges for {url}")
+        self.url = r.url
+        self.size = int(length)
+        self.name = utils.filename_from_url(url, "remote.zip")
+        etag = r.headers.get("ETag")
+        self.validator = etag if etag and not etag.startswith("W/") \
+            else r.headers.get("Last-Modified")
+        self.fetched = 0
+        self.requests = 0
+        self._pos = 0
+        self._spans: List[Tuple[int, bytes]] = []
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self._pos
+        elif whence == io.SEEK_END:
+            offset += self.size
+        if offset < 0:
+            raise ValueError("negative seek position")
+        self._pos = offset
+        return self._pos
+
+    def _get(self, start: int, end: int) -> bytes:
+        cancel_mod.check(self.cancel)
+        headers = {**http_client.IDENTITY, "Range": f"bytes={start}-{end}"}
+        if self.validator:
+            headers["If-Range"] = self.validator
+        r = self.session.get(self.url, headers=headers,
+                             timeout=http_client.TIMEOUT)
+        r.raise_for_status()
+        if r.status_code != 206 or not r.headers.get(
+                "Content-Range", "").startswith(f"bytes {start}-"):
+            raise RangeNotSupported(
+                f"HTTP {r.status_code} for range {start}-{end}")
+        data = r.content
+        if len(data) != end - start + 1:
+            raise requests.exceptions.ChunkedEncodingError(
+                f"Short range read: {len(data)} of {end - start + 1} bytes")
+        self.requests += 1
+        self.fetched += len(data)
+        if self.throttle is not None:
+            self.throttle(len(data))
+        return data
+
+    def _remember(self, start: int, data: bytes) -> None:
+        self._spans.append((start, data))
+        while len(self._spans) > 1 and sum(
+                len(d) for _, d in self._spans) > MAX_CACHED_BYTES:
+            self._spans.pop(0)
+
+    def prefetch(self, start: int, end: int) -> None:
+        """Loads bytes start..end (inclusive) with a single request."""
+        end = min(end, self.size - 1)
+        if start <= end and end - start < MAX_SPAN:
+            self._remember(start, self._get(start, end))
+
+    def readinto(self, b) -> int:
+        want = min(len(b), max(0, self.size - self._pos))
+        view = memoryview(b)
+        filled = 0
+        while filled < want:
+            pos = self._pos + filled
+            for start, data in reversed(self._spans):
+                if start <= pos < start + len(data):
+                    break
+            else:
+                start = pos
+                data = self._get(pos, min(self.size, pos + max(
+                    BLOCK_SIZE, want - filled)) - 1)
+                self._remember(start, data)
+            n = min(want - filled, start + len(data) - pos)
+            view[filled:filled + n] = data[pos - start:pos - start + n]
+            filled += n
+        self._pos += filled
+        return filled
+
+
+def _member_spans(infos: List[zipfile.ZipInfo]) -> List[Tuple[int, int]]:
+    """Byte spans (inclusive) covering header + data of `infos`, merged."""
+    spans: List[List[int]] = []
+    for info in sorted(infos, key=lambda i: i.header_offset):
+        start = info.header_offset
+        # + Data Descriptor (max. 24 Byte bei ZIP64)
+        end = (start + LOCAL_HEADER_SLACK + len(info.filename.encode())
+               + info.compress_size + 24)
+        if spans and start - spans[-1][1] <= MERGE_GAP:
+            spans[-1][1] = max(spans[-1][1], end)
+        else:
+            spans.append([start, end])
+    return [(s, e) for s, e in spans]
+
+
+def extract_remote(url: str, dest_dir: str, members: List[str],
+                   session: Optional[requests.Session] = None,
+                   throttle: Optional[Callable[[int], None]] = None,
+                   cancel: Optional[cancel_mod.CancelToken] = None
+                   ) -> extract.ExtractResult:
+    """Extracts only `members` of the zip at `url` without downloading it.
+
+    Reads the central directory via ranged GETs, then fetches the local
+    headers + compressed data of the wanted members (adjacent members in
+    one request). Unchanged files on disk are skipped as in extract_zip.
+    CRC-32 of every member is checked by zipfile while extracting.
+
+    Returns:
+        ExtractResult; `fetched` holds the bytes actually transferred.
+
+    Raises:
+        RangeNotSupported, requests.RequestException, zipfile.BadZipFile,
+        ValueError: Callers fall back to a full download.
+        cancel.Cancelled: If `cancel` fired (checked before every request).
+    """
+    t0 = time.time()
+    rf = RangeFile(url, session=session, throttle=throttle, cancel=cancel)
+    rf.prefetch(max(0, rf.size - TAIL_SIZE), rf.size - 1)
+
+    def _prefetch(todo: List[zipfile.ZipInfo]) -> None:
+        for start, end in _member_spans(todo):
+            rf.prefetch(start, end)
+
+    result = extract.extract_zip(rf, dest_dir, members,
+                                 before_extract=_prefetch, cancel=cancel)
+    result.fetched = rf.fetched
+    result.requests = rf.requests
+    result.seconds = round(time.time() - t0, 3)
+    return result
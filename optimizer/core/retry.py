@@ -0,0 +1,185 @@
+import random
+import subprocess
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, Optional, TypeVar
+
+import requests
+
+from . import cancel as cancel_mod
+from .logging_setup import log_event
+
+T = TypeVar("T")
+
+# Versuche je Aufruf und Backoff-Grenzen in Sekunden
+MAX_ATTEMPTS = 3
+BASE_DELAY = 1.0
+MAX_DELAY = 30.0
+# Längere Retry-After-Angaben werden gekappt (Server kann lange Pausen melden)
+RETRY_AFTER_MAX = 120.0
+# Circuit Breaker: nach so vielen Fehlschlägen in Folge ist der Host "offen"
+BREAKER_THRESHOLD = 4
+BREAKER_COOLDOWN = 60.0
+
+# HTTP-Status, bei denen ein erneuter Versuch sinnvoll ist
+RETRYABLE_STATUS = {408, 425, 429, 500, 502, 503, 504}
+
+
+class CircuitOpen(Exception):
+    """The endpoint failed repeatedly; calls fail fast until the cooldown."""
+
+
+def retry_after(exc: BaseException) -> Optional[float]:
+    """Seconds from a Retry-After header on the error's response, if any."""
+    response = getattr(exc, "response", None)
+    value = response.headers.get("Retry-After") if response is not None \
+        else None
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError, OverflowError):
+        return None
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """Transient errors (network, 5xx/429, timeouts, failed subprocesses).
+
+    Not retryable: 4xx, invalid URLs, hash/zip errors and anything else
+    that would fail the same way on the next attempt.
+    """
+    if isinstance(exc, CircuitOpen):
+        return False
+    if isinstance(exc, requests.HTTPError):
+        response = exc.response
+        return response is not None and \
+            response.status_code in RETRYABLE_STATUS
+    if isinstance(exc, (requests.exceptions.InvalidURL,
+                        requests.exceptions.MissingSchema,
+                        requests.exceptions.InvalidSchema,
+                        requests.exceptions.TooManyRedirects)):
+        return False
+    if isinstance(exc, requests.RequestException):
+        return True
+    return isinstance(exc, (subprocess.CalledProcessError,
+                            subprocess.TimeoutExpired))
+
+
+def backoff(attempt: int, base: float = BASE_DELAY,
+            cap: float = MAX_DELAY) -> float:
+    """Capped exponential backoff with full jitter (attempt counts from 1)."""
+    return random.uniform(0, min(cap, base * 2 ** (attempt - 1)))
+
+
+class CircuitBreaker:
+    """Per-key (usually per-host) breaker shared by all callers.
+
+    After `threshold` retryable failures in a row the key is open: calls
+    raise CircuitOpen immediately instead of waiting through timeouts and
+    backoff. After `cooldown` seconds one trial call is let through
+    (half-open); success closes the breaker, failure opens it again.
+    """
+
+    def __init__(self, threshold: int = BREAKER_THRESHOLD,
+                 cooldown: float = BREAKER_COOLDOWN) -> None:
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._failures: Dict[str, int] = {}
+        self._open_until: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def before(self, key: Optional[str]) -> None:
+        if key is None:
+            return
+        with self._lock:
+            until = self._open_until.get(key)
+            if until is None:
+                return
+            now = time.monotonic()
+            if now < until:
+                raise CircuitOpen(
+                    f"{key} unavailable, retry in {int(until - now) + 1}s")
+            # Halb offen: genau ein Probeaufruf, alle anderen warten ab
+            self._open_until[key] = now + self.cooldown
+
+    def success(self, key: Optional[str]) -> None:
+        if key is None:
+            return
+        with self._lock:
+            self._failures.pop(key, None)
+            self._open_until.pop(key, None)
+
+    def failure(self, key: Optional[str]) -> bool:
+        """Counts a failure; True if the breaker is (re)opened by it."""
+        if key is None:
+            return False
+        with self._lock:
+            count = self._failures.get(key, 0) + 1
+            self._failures[key] = count
+            if count < self.threshold:
+                return False
+            self._open_until[key] = time.monotonic() + self.cooldown
+            return True
+
+    def reset(self, key: Optional[str] = None) -> None:
+        """Closes one key (or all), e.g. when the user retries manually."""
+        with self._lock:
+            if key is None:
+                self._failures.clear()
+                self._open_until.clear()
+            else:
+                self._failures.pop(key, None)
+                self._open_until.pop(key, None)
+
+
+breaker = CircuitBreaker()
+
+
+def call(fn: Callable[[], T], op: str, key: Optional[str] = None,
+         log: Optional[Any] = None, attempts: int = MAX_ATTEMPTS,
+         base: float = BASE_DELAY, cap: float = MAX_DELAY,
+         classify: Callable[[BaseException], bool] = is_retryable,
+         cancel: Optional[cancel_mod.CancelToken] = None,
+         **fields: Any) -> T:
+    """Runs `fn` with retries; the standard policy for network/subprocess.
+
+    Waits with jittered exponential backoff between attempts, or for the
+    server's Retry-After if it sent one. Errors `classify` rejects are
+    raised at once without sleeping. `key` selects the circuit breaker
+    (e.g. the host); None skips it. Retries are logged as "<op>_retry"
+    with `fields`, an opening breaker as "circuit_open". Backoff sleeps
+    end early when `cancel` fires.
+
+    Raises:
+        The last error of `fn`, CircuitOpen or cancel.Cancelled.
+    """
+    attempt = 0
+    while True:
+        attempt += 1
+        breaker.before(key)
+        try:
+            result = fn()
+        except Exception as e:
+            retryable = classify(e)
+            opened = retryable and breaker.failure(key)
+            if opened and log is not None:
+                log_event(log, "circuit_open", key=key, op=op,
+                          cooldown_s=breaker.cooldown)
+            # Kein Backoff, wenn ohnehin nur noch CircuitOpen folgen würde
+            if not retryable or opened or attempt >= attempts:
+                raise
+            hint = retry_after(e)
+            delay = min(hint, RETRY_AFTER_MAX) if hint is not None \
+                else backoff(attempt, base, cap)
+            if log is not None:
+                log_event(log, f"{op}_retry", attempt=attempt,
+                          delay_s=round(delay, 2), retry_after=hint,
+                          err=f"{type(e).__name__}: {e}", **fields)
+            cancel_mod.sleep(cancel, delay)
+            continue
+        breaker.success(key)
+        return result
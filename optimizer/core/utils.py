@@ -1,6 +1,6 @@
 import hashlib
 import os
-from typing import Optional
+from typing import List, Optional
 
 
 def compute_sha256(file_path: str) -> str:
@@ -43,4 +43,10 @@ def ensure_dir(path: str) -> None:
     os.makedirs(path, exist_ok=True)
 
 
-
+def file_stamp(path: str) -> Optional[List[int]]:
+    """[size, mtime_ns] of a file, None if it is missing."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [st.st_size, st.st_mtime_ns]
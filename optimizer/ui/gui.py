@@ -15,9 +15,13 @@ from ttkbootstrap.dialogs import Messagebox
 from ttkbootstrap import ttk as ttk
 
 from optimizer.core import uac
+from optimizer.core import cancel
 from optimizer.core import operations
 from optimizer.core import config
 from optimizer.core import diagnostics
+from optimizer.core import downloads
+from optimizer.core import bundle
+from optimizer.core import catalog
 from optimizer.core.logging_setup import setup_logging, PhaseLoggerAdapter, log_event, log_exceptions, SESSION_ID
 
 class ModernOptimizerGUI:
@@ -80,6 +84,11 @@ class ModernOptimizerGUI:
 
         self.restore_last_action = None
         self.restore_last_point = None
+        # Vorab geladene Tweaker-Tools (url/sha256), übersteht Neustarts
+        self.tweaker_prefetch = {}
+        # Guide-Downloads: Tool -> {status, percent, text} (siehe operations)
+        self.guide_queue = {}
+        self._guide_rows = {}
 
         self._admin_win = None
         self._admin_authed = False
@@ -123,6 +132,8 @@ class ModernOptimizerGUI:
         self.tweaker_dir = self.download_dir
 
         self.phase_token = 0
+        # Abbruch-Token der aktuellen Phase (siehe advance_phase)
+        self.phase_cancel = cancel.CancelToken()
         self.current_phase = None
 
         log_event(self.log, "app_start",
@@ -275,33 +286,54 @@ class ModernOptimizerGUI:
 
     def setup_download_urls(self):
         """Sets up the download URLs for the optimizer tools."""
-        with open(os.path.join(config.BASE_DIR, "optimizer", "core", "links.json")) as f:
-            links = json.load(f)
-        
+        # links.json bzw. zwischengespeicherter Remote-Katalog (ohne Netzwerk)
+        cat = catalog.get_catalog()
+        links = cat.links
+        log_event(self.log, "catalog_loaded", origin=cat.origin,
+                  url=cat.meta.get("url"), fetched_at=cat.meta.get("fetched_at"))
+
         if self.is_win10:
-            talon_url = links["download_urls"]["talon_win10"]
+            talon_url, talon_opts = cat.download("talon_win10")
             self.talon_name = 'TalonLite'
         else:
-            talon_url = links["download_urls"]["talon_win11"]
+            talon_url, talon_opts = cat.download("talon_win11")
             self.talon_name = 'Talon'
         
         # Downloads-Phase: Nur Talon/TalonLite vorbereiten.
         self.download_urls = {
             'talon': talon_url
         }
+        # Optionen pro Artefakt (z.B. "segments") aus Objekt-Einträgen in links.json
+        self.download_options = {'talon': talon_opts}
 
         # Tweaker on-demand: Keep EXM Tweaks and BoosterX URLs ready for later installation.
-        self.tweaker_urls = {
-            'exm_tweaks': links["download_urls"]["exm_tweaks"],
-            'boosterx': links["download_urls"]["boosterx"]
-        }
+        self.tweaker_urls = {}
+        for key in ('exm_tweaks', 'boosterx'):
+            self.tweaker_urls[key], self.download_options[key] = cat.download(key)
         
         # Guide-Tab Downloads
-        self.guide_downloads = links.get("guide_downloads", {})
-
-        self.choco_apps = links["choco_apps"]
+        self.guide_downloads = {}
+        for key in cat.tools:
+            self.guide_downloads[key], self.download_options[key] = cat.tool(key)
+
+        # Bandbreitenlimits + Stall-Watchdog (links.json "network", Env hat Vorrang)
+        limits = downloads.configure_network(links.get("network"), self.log)
+        log_event(self.log, "network_limits", **limits)
+        # Offline-Bundle (--bundle, OPTIMIZER_BUNDLE oder optimizer_bundle.zip)
+        bundle.mount(log=self.log)
+        # DNS/TCP/TLS zu allen Download-Hosts vorab aufbauen (Hintergrund)
+        operations.warm_connections(self)
+        # Remote-Katalog bedingt neu laden; wirkt für Guide-Downloads sofort,
+        # sonst ab dem nächsten Start
+        catalog.refresh_async(self.log)
+
+        self.choco_apps = list(cat.apps.values())
         # Optionale Download-Hashes laden (falls vorhanden)
-        self.download_hashes = links.get("hashes", {})
+        self.download_hashes = dict(links.get("hashes", {}))
+        # "sha256" direkt am Eintrag gilt für alle Spiegel dieses Artefakts
+        for key, opts in self.download_options.items():
+            if opts.get("sha256"):
+                self.download_hashes.setdefault(key, opts["sha256"])
         # Admin-Passwort cachen
         self.admin_password = links.get("admin_password")
 
@@ -340,6 +372,14 @@ class ModernOptimizerGUI:
         row.grid_columnconfigure(1, weight=1)
         return row
 
+    def advance_phase(self):
+        """Starts a new phase: stale UI updates are dropped and background
+        work of the previous phase (downloads, extraction, choco) is cancelled."""
+        self.phase_token += 1
+        self.phase_cancel.cancel(reason=f"phase_change:{self.phase_token}")
+        self.phase_cancel = cancel.CancelToken()
+        return self.phase_token
+
     def ui_set(self, percent=None, text=None, token=None):
         """Updates the UI with progress."""
         def _do():
@@ -577,7 +617,7 @@ class ModernOptimizerGUI:
     def show_restore_prompt(self):
         """Shows the restore point phase."""
         self.clear_frame()
-        self.phase_token += 1
+        self.advance_phase()
         self.current_phase = self.TAB_RESTORE
         self.log.phase = self.TAB_RESTORE
         # Phase sofort persistieren, damit der Start immer auf Restore abbildbar ist
@@ -643,9 +683,10 @@ class ModernOptimizerGUI:
     def show_antivirus_phase(self):
         """Shows the antivirus configuration phase."""
         self.clear_frame()
-        self.phase_token += 1
+        self.advance_phase()
         self.log.phase = self.TAB_ANTIVIRUS
         log_event(self.log, "enter_phase", name=self.TAB_ANTIVIRUS)
+        operations.prefetch_tweakers(self)
         main = self.make_responsive_frame()
         self.headline(main, "Antivirus Configuration", icon="🛡️").grid(row=0, column=0, columnspan=2, sticky="ew", pady=(0, 12))
         if self.is_win10:
@@ -712,10 +753,11 @@ class ModernOptimizerGUI:
     def show_download_phase(self):
         """Shows the download phase."""
         self.clear_frame()
-        self.phase_token += 1
+        self.advance_phase()
         token = self.phase_token
         self.log.phase = self.TAB_DOWNLOAD
         log_event(self.log, "enter_phase", name=self.TAB_DOWNLOAD)
+        operations.prefetch_tweakers(self)
         main = self.make_responsive_frame()
         win_str = "Windows 10" if self.is_win10 else "Windows 11+"
         self.headline(main, "Prepare Downloads", icon="🚀").grid(row=0, column=0, columnspan=2, sticky="ew", pady=(0, 16))
@@ -743,9 +785,10 @@ class ModernOptimizerGUI:
     def show_talon_phase(self):
         """Shows the Talon phase."""
         self.clear_frame()
-        self.phase_token += 1
+        self.advance_phase()
         self.log.phase = self.TAB_TALON
         log_event(self.log, "enter_phase", name=self.TAB_TALON)
+        operations.prefetch_tweakers(self)
         main = self.make_responsive_frame()
         self.headline(main, "System Optimization", icon="⚡").grid(row=0, column=0, columnspan=2, sticky="ew", pady=(0, 12))
         self.sublabel(main, f"{self.talon_name} will be started. After completion, a restart will occur and the app will continue.",
@@ -761,10 +804,11 @@ class ModernOptimizerGUI:
     def show_tweaker_hub(self):
         """Shows the Tweaker Hub phase."""
         self.clear_frame()
-        self.phase_token += 1
+        self.advance_phase()
         self.current_phase = self.TAB_TWEAKER
         self.log.phase = self.TAB_TWEAKER
         log_event(self.log, "enter_phase", name=self.TAB_TWEAKER)
+        operations.prefetch_tweakers(self)
         
         # Reload flags from saved status to ensure they're current
         import json
@@ -857,7 +901,7 @@ class ModernOptimizerGUI:
     def show_lifetime_license_phase(self):
         """Shows the lifetime license phase."""
         self.clear_frame()
-        self.phase_token += 1
+        self.advance_phase()
         self.current_phase = self.TAB_LIFETIME_LICENSE
         self.log.phase = self.TAB_LIFETIME_LICENSE
         log_event(self.log, "enter_phase", name=self.TAB_LIFETIME_LICENSE)
@@ -907,7 +951,7 @@ class ModernOptimizerGUI:
     def show_apps_phase(self):
         """Shows the optional apps phase."""
         self.clear_frame()
-        self.phase_token += 1
+        self.advance_phase()
         self.current_phase = self.TAB_APPS
         self.log.phase = self.TAB_APPS
         self.visited_apps = True
@@ -950,7 +994,7 @@ class ModernOptimizerGUI:
     def show_guide_phase(self):
         """Shows the guide phase."""
         self.clear_frame()
-        self.phase_token += 1
+        self.advance_phase()
         self.current_phase = self.TAB_GUIDE
         self.log.phase = self.TAB_GUIDE
         self.visited_guide = True
@@ -992,6 +1036,14 @@ class ModernOptimizerGUI:
         ttk.Button(links, text="Video: FSR3/DLSS FG Mods Explained", bootstyle="info",
                    command=lambda: operations.open_url(self, "https://www.youtube.com/watch?v=7aYjsYDEcYg")).grid(row=4, column=0, columnspan=2, sticky="ew", pady=4)
 
+        # Download-Warteschlange: eine Zeile (Text + Balken) je Tool
+        self._guide_queue_frame = ttk.Frame(main)
+        self._guide_queue_frame.grid(row=4, column=0, columnspan=2, sticky="ew", pady=(8, 0))
+        self._guide_queue_frame.grid_columnconfigure(0, weight=1)
+        self._guide_rows = {}
+        for tool_name in self.guide_queue:
+            self.update_guide_queue(tool_name)
+
         btns = self.button_row(main)
         btns.grid(row=5, column=0, columnspan=2, sticky="ew", pady=(18, 0))
         ttk.Button(btns, text="Continue", bootstyle="success", command=self._complete_guide_and_continue).grid(row=0, column=1, sticky="ew", padx=(8, 0))
@@ -1006,7 +1058,7 @@ class ModernOptimizerGUI:
     def show_final_step(self):
         """Shows the final step phase."""
         self.clear_frame()
-        self.phase_token += 1
+        self.advance_phase()
         self.current_phase = self.TAB_FINAL
         self.log.phase = self.TAB_FINAL
         log_event(self.log, "enter_phase", name=self.TAB_FINAL)
@@ -1087,11 +1139,41 @@ class ModernOptimizerGUI:
     
     def _download_with_confirmation(self, tool_name: str):
         """Download mit Bestätigung im Hauptthread."""
+        state = self.guide_queue.get(tool_name) or {}
+        if state.get("status") in operations.GUIDE_ACTIVE:
+            # Läuft bereits - Fortschritt steht in der Warteschlange
+            return
         if Messagebox.yesno(
             f"Do you really want to download {tool_name}?", title="Confirm Download"
         ):
             operations.download_from_guide(self, tool_name)
 
+    def update_guide_queue(self, tool_name: str):
+        """Shows the state of one guide download in the guide tab (main thread)."""
+        frame = getattr(self, "_guide_queue_frame", None)
+        state = self.guide_queue.get(tool_name)
+        if frame is None or state is None or not frame.winfo_exists():
+            return
+        row = self._guide_rows.get(tool_name)
+        if row is None:
+            index = len(self._guide_rows)
+            var = tk.StringVar()
+            ttk.Label(frame, textvariable=var, wraplength=720, justify="left").grid(
+                row=2 * index, column=0, sticky="ew", pady=(4, 0))
+            bar = ttk.Progressbar(frame, mode="determinate", maximum=100,
+                                  bootstyle="info-striped")
+            bar.grid(row=2 * index + 1, column=0, sticky="ew")
+            row = self._guide_rows[tool_name] = (var, bar)
+        var, bar = row
+        labels = {"queued": "wartet", "downloading": "lädt", "verifying": "prüft",
+                  "extracting": "entpackt", "done": "fertig",
+                  "failed": "fehlgeschlagen", "cancelled": "abgebrochen"}
+        status = labels.get(state["status"], state["status"])
+        var.set(f"{tool_name} – {status}: {state.get('text', '')}")
+        bar["value"] = state.get("percent", 0)
+        bar.configure(bootstyle={"done": "success", "failed": "danger",
+                                 "cancelled": "secondary"}.get(state["status"], "info-striped"))
+
     def _update_tweaker_progress_display(self):
         """Updates the tweaker progress text and bar."""
         progress_x = int(self.exm_done_once) + int(self.boosterx_done_once)
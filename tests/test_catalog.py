@@ -0,0 +1,121 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from optimizer.core import catalog
+
+LOCAL = {
+    "download_urls": {
+        "talon_win10": "https://example.invalid/talon10.zip",
+        "talon_win11": "https://example.invalid/talon11.zip",
+        "exm_tweaks": "https://example.invalid/exm.zip",
+        "boosterx": "https://example.invalid/BoosterX.exe",
+    },
+    "guide_downloads": {"tool": "https://example.invalid/tool.zip"},
+    "choco_apps": [{"key": "git", "pkg": "git"}],
+    "network": {"peers": []},
+    "admin_password": "local",
+}
+REMOTE = {
+    "download_urls": {"boosterx": "https://example.invalid/BoosterX-2.exe"},
+    "hashes": {"boosterx": "ab" * 32},
+    # Darf lokale Einstellungen nicht überschreiben
+    "admin_password": "remote",
+    "network": {"peers": ["http://attacker.invalid:8765"]},
+    "catalog_url": "http://attacker.invalid/catalog.json",
+}
+ETAG = '"rev1"'
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.server.seen.append(dict(self.headers))
+        if self.headers.get("If-None-Match") == ETAG:
+            self.send_response(304)
+            self.send_header("ETag", ETAG)
+            self.end_headers()
+            return
+        body = json.dumps(REMOTE).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", ETAG)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    httpd.seen = []
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def paths(tmp_path, server, monkeypatch):
+    monkeypatch.delenv(catalog.ENV_VAR, raising=False)
+    url = f"http://127.0.0.1:{server.server_address[1]}/catalog.json"
+    links_path = tmp_path / "links.json"
+    links_path.write_text(json.dumps(dict(LOCAL, catalog_url=url)),
+                          encoding="utf-8")
+    cache_path = tmp_path / "catalog.cache.json"
+    monkeypatch.setattr(catalog, "_catalog",
+                        catalog.load(str(links_path), str(cache_path)))
+    return str(links_path), str(cache_path), url
+
+
+def _refresh(paths):
+    links_path, cache_path, _ = paths
+    return catalog.refresh(links_path=links_path, cache_path=cache_path)
+
+
+def test_refresh_updated_then_not_modified(server, paths):
+    assert _refresh(paths) == "updated"
+    cat = catalog.get_catalog()
+    assert cat.origin == "remote"
+    assert cat.download("boosterx")[0].endswith("BoosterX-2.exe")
+    assert cat.download("exm_tweaks")[0].endswith("exm.zip")
+    assert cat.links["hashes"] == REMOTE["hashes"]
+    assert cat.links["admin_password"] == "local"
+    assert cat.links["network"] == {"peers": []}
+    assert cat.links["catalog_url"] == paths[2]
+    assert "If-None-Match" not in server.seen[0]
+
+    assert _refresh(paths) == "not_modified"
+    assert server.seen[1].get("If-None-Match") == ETAG
+    assert catalog.get_catalog().download("boosterx")[0].endswith(
+        "BoosterX-2.exe")
+
+
+def test_load_from_cache(paths):
+    links_path, cache_path, _ = paths
+    assert _refresh(paths) == "updated"
+    cat = catalog.load(links_path, cache_path)
+    assert cat.origin == "cache"
+    assert cat.meta["etag"] == ETAG
+    assert cat.download("boosterx")[0].endswith("BoosterX-2.exe")
+    assert cat.links["admin_password"] == "local"
+
+
+def test_load_ignores_foreign_or_outdated_cache(paths):
+    links_path, cache_path, url = paths
+    assert _refresh(paths) == "updated"
+    with open(cache_path, encoding="utf-8") as f:
+        data = json.load(f)
+
+    for change in ({"schema": catalog.CATALOG_SCHEMA + 1},
+                   {"url": url + "?other"}):
+        with open(cache_path, "w", encoding="utf-8") as f:
+            json.dump(dict(data, **change), f)
+        cat = catalog.load(links_path, cache_path)
+        assert cat.origin == "local"
+        assert cat.download("boosterx")[0].endswith("BoosterX.exe")
+        assert cat.meta == {"url": url}
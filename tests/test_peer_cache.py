@@ -0,0 +1,102 @@
+import hashlib
+import os
+from urllib.parse import quote
+
+import pytest
+import requests
+
+from optimizer.core import artifact_cache
+from optimizer.core import downloads
+from optimizer.core import lockfile
+from optimizer.core import peer_cache
+from optimizer.core import retry
+
+# Upstream ist absichtlich unerreichbar: Treffer können nur vom Peer kommen
+URL = "http://upstream.invalid/tools/talon.zip"
+PAYLOAD = os.urandom(256 * 1024)
+SHA256 = hashlib.sha256(PAYLOAD).hexdigest()
+
+
+@pytest.fixture
+def peer(tmp_path, monkeypatch):
+    # Weder echte links.lock noch Breaker-Zustand anderer Tests
+    monkeypatch.setattr(lockfile, "_lockfile",
+                        lockfile.LockFile(str(tmp_path / "links.lock")))
+    monkeypatch.setattr(retry, "breaker", retry.CircuitBreaker())
+    src = tmp_path / "talon.zip"
+    src.write_bytes(PAYLOAD)
+    cache = artifact_cache.ArtifactCache(str(tmp_path / "peer-cache"))
+    cache.store(str(src), URL, etag='"v1"', sha256=SHA256)
+    server = peer_cache.PeerServer(cache, "127.0.0.1", 0)
+    server.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def _manager(tmp_path, peer):
+    manager = downloads.DownloadManager(
+        cache=artifact_cache.ArtifactCache(str(tmp_path / "local-cache")))
+    manager.peers = [peer]
+    return manager
+
+
+def test_lookup_hit_and_miss(peer):
+    r = requests.get(f"{peer}/lookup?url={quote(URL, safe='')}")
+    assert r.status_code == 200
+    entry = r.json()
+    assert entry["sha256"] == SHA256
+    assert entry["size"] == len(PAYLOAD)
+    assert entry["etag"] == '"v1"'
+    assert entry["path"] == f"/objects/{SHA256}"
+
+    r = requests.get(f"{peer}/lookup?url={quote(URL + '.old', safe='')}")
+    assert r.status_code == 404
+    assert requests.get(f"{peer}/objects/{'0' * 64}").status_code == 404
+
+
+def test_object_ranges(peer):
+    obj = f"{peer}/objects/{SHA256}"
+    r = requests.get(obj, headers={"Range": "bytes=10-19"})
+    assert r.status_code == 206
+    assert r.headers["Content-Range"] == f"bytes 10-19/{len(PAYLOAD)}"
+    assert r.content == PAYLOAD[10:20]
+
+    r = requests.get(obj, headers={"Range": f"bytes={len(PAYLOAD)}-"})
+    assert r.status_code == 416
+    assert r.headers["Content-Range"] == f"bytes */{len(PAYLOAD)}"
+
+    # Fremder Validator in If-Range -> ganze Datei
+    r = requests.get(obj, headers={"Range": "bytes=10-", "If-Range": '"x"'})
+    assert r.status_code == 200
+    assert r.content == PAYLOAD
+
+
+def test_fetch_from_peer(tmp_path, peer):
+    manager = _manager(tmp_path, peer)
+    dest = tmp_path / "dl" / "talon.zip"
+    result = manager.fetch(URL, str(dest), {"sha256": f"sha256:{SHA256}"})
+    assert result.source == f"peer:{peer}"
+    assert result.sha256 == SHA256
+    assert dest.read_bytes() == PAYLOAD
+    assert manager.cache.lookup(URL)["sha256"] == SHA256
+
+
+def test_fetch_from_peer_with_locked_hash(tmp_path, peer):
+    locked = tmp_path / "locked.zip"
+    locked.write_bytes(PAYLOAD)
+    lockfile.get_lock().record("talon", downloads.DownloadResult(
+        url=URL, dest=str(locked), bytes=len(PAYLOAD), sha256=SHA256))
+    manager = _manager(tmp_path, peer)
+    result = manager.fetch(URL, str(tmp_path / "dl" / "talon.zip"), {})
+    assert result.source == f"peer:{peer}"
+
+
+def test_peer_needs_trusted_hash(tmp_path, peer):
+    manager = _manager(tmp_path, peer)
+    dest = tmp_path / "dl" / "talon.zip"
+    # Ohne Hash und mit abweichendem Hash bleibt nur upstream (unerreichbar)
+    for options in ({}, {"sha256": "0" * 64}):
+        with pytest.raises(requests.RequestException):
+            manager.fetch(URL, str(dest), options)
+        assert not dest.exists()